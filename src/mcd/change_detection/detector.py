@@ -1,20 +1,100 @@
 """Module for the change detection."""
 
-import json
+import collections
+import collections.abc
+import itertools
 import logging
+import multiprocessing
+import os
 import pathlib
 import typing
+from concurrent import futures
 
-import cv2
+import numpy as np
+import numpy.typing as npt
+from PIL import Image
 from rich import progress
 
-from mcd import log
-from mcd.change_detection import label, result
+from mcd import dtypes, log
+from mcd.change_detection import exceptions, label, result
 from mcd.loader import base as loader_base
 
 _LOGGER: typing.Final[logging.Logger] = log.setup_logger(__name__)
 """Logger for the module."""
 
+_MAX_PAIRS_FOR_LOOP: typing.Final[int] = 64
+"""Maximum number of pairs in a label group compared by a plain loop.
+
+For small groups, the fixed cost of NumPy calls outweighs the comparisons themselves,
+which is the common case for object detection with a few boxes per label.
+"""
+
+_MIN_PAIRS_FOR_PROCESSES: typing.Final[int] = 256
+"""Minimum number of image pairs compared in worker processes.
+
+A pair is compared in about half a millisecond, while starting the worker processes
+takes about a quarter of a second, so fewer pairs are compared in this process.
+"""
+
+
+class _PackedLabels(typing.NamedTuple):
+    """Labels packed into plain arrays for the vectorized comparison.
+
+    Accessing the fields of Pydantic models is relatively slow, so the labels are
+    packed once and the comparison works on the arrays only.
+
+    Attributes
+    ----------
+    bounding_boxes : np.ndarray, shape (N, 4)
+        Bounding boxes in the format (x1, y1, x2, y2) in single precision.
+    label_ids : np.ndarray, shape (N,)
+        Label identifiers, or None if not provided.
+    label_names : np.ndarray, shape (N,)
+        Label names, or None if not provided.
+    """
+
+    bounding_boxes: npt.NDArray[np.float32]
+    """Bounding boxes in the format (x1, y1, x2, y2) in single precision.
+
+    The coordinates are normalized to [0, 1] and only compared with each other, so
+    double precision is not needed. Rounding preserves the order of the coordinates,
+    hence only overlaps smaller than the precision of float32 are lost.
+    """
+
+    label_ids: npt.NDArray[np.object_]
+    """Label identifiers, or None if not provided."""
+
+    label_names: npt.NDArray[np.object_]
+    """Label names, or None if not provided."""
+
+    @classmethod
+    def from_labels(cls, labels: list[label.LabelInfo]) -> typing.Self:
+        """Pack labels into arrays.
+
+        Parameters
+        ----------
+        labels : list[LabelInfo]
+            List of N labels.
+
+        Returns
+        -------
+        _PackedLabels
+            Packed labels.
+        """
+        bounding_boxes: list[tuple[float, float, float, float]] = []
+        label_ids: list[label.LabelId | None] = []
+        label_names: list[label.LabelName | None] = []
+        for info in labels:
+            bounding_boxes.append(info.bounding_box.xyxy)
+            label_ids.append(info.label_id)
+            label_names.append(info.label_name)
+
+        return cls(
+            bounding_boxes=np.array(bounding_boxes, dtype=np.float32).reshape(-1, 4),
+            label_ids=np.array(label_ids, dtype=object),
+            label_names=np.array(label_names, dtype=object),
+        )
+
 
 class ChangeDetector:
     """Change detector.
@@ -54,6 +134,7 @@ class ChangeDetector:
         datasets_path: pathlib.Path,
         loader: loader_base.ObjectDetectionDataLoaderBase,
         before_name: str = "before",
+        max_workers: int | None = None,
     ) -> result.ChangeDetectionResults:
         """Run change detection on all pairs of images in a directory.
 
@@ -85,11 +166,24 @@ class ChangeDetector:
         before_name : str, default "before"
             Name of the dataset that represents the scene before the change. This should
             be the name of the directory containing the images before the change.
+        max_workers : int | None, default None
+            Maximum number of processes to detect changes in parallel. If None, the
+            number of processors on the machine is used. If 1, or if there are only a
+            few pairs, the changes are detected in this process.
+
+            The worker processes are started by a fork server, which is only available
+            on POSIX systems. The loader is pickled to the workers, so its class must
+            be importable from a module.
 
         Returns
         -------
         ChangeDetectionResults
             Results of the change detection.
+
+        Raises
+        ------
+        LabelInconsistentError
+            Raised when the labels of a pair are inconsistent.
         """
         if not (before_dataset_path := datasets_path / before_name).exists():
             raise FileNotFoundError(before_dataset_path)
@@ -97,64 +191,252 @@ class ChangeDetector:
         after_dataset_path = loader.get_after_dataset_path(datasets_path, before_name)
 
         before_image_path = next(loader.get_images_path(before_dataset_path))
-        image = cv2.imread(before_image_path.as_posix())
-        height, width = image.shape[:2]
+        # NOTE: `Image.open()` only parses the header, so the pixels are not decoded
+        with Image.open(before_image_path) as image:
+            width, height = image.size
 
         results = result.ChangeDetectionResults(
             result={}, image_height=height, image_width=width
         )
-        before_dataset_items_path = list(loader.get_labels_path(before_dataset_path))
+        # The 'after' dataset is listed once, instead of checking the existence of
+        # each corresponding item separately
+        after_items = {
+            after_item_path.relative_to(after_dataset_path)
+            for after_item_path in loader.get_labels_path(after_dataset_path)
+        }
+
+        image_id_to_paths: dict[dtypes.ImageId, tuple[pathlib.Path, pathlib.Path]] = {}
+        for before_item_path in loader.get_labels_path(before_dataset_path):
+            item = before_item_path.relative_to(before_dataset_path)
+
+            # Skip if the corresponding item in the 'after' dataset does not exist
+            if item not in after_items:
+                continue
+
+            image_id_to_paths[before_item_path.stem] = (
+                before_item_path,
+                after_dataset_path / item,
+            )
+
+        image_id_to_result: dict[dtypes.ImageId, result.SinglePairResult] = {}
         with progress.Progress() as progress_bar:
             task = progress_bar.add_task(
-                "[cyan]Detecting changes", total=len(before_dataset_items_path)
+                "[cyan]Detecting changes", total=len(image_id_to_paths)
             )
-            for before_item_path in before_dataset_items_path:
-                image_id = before_item_path.stem
-                after_item_path = after_dataset_path / before_item_path.relative_to(
-                    before_dataset_path
-                )
-
+            for image_id, single_pair_result in self._iter_results(
+                image_id_to_paths, loader, max_workers
+            ):
+                image_id_to_result[image_id] = single_pair_result
                 progress_bar.update(
                     task,
                     advance=1,
-                    description="[green]Detecting changes[/green] in "
-                    f"{before_item_path.name}",
+                    description=f"[green]Detecting changes[/green] in {image_id}",
                 )
 
-                # Skip if the corresponding item in the 'after' dataset does not exist
-                if not after_item_path.exists():
-                    continue
-
-                results.result[image_id] = self.run(
-                    before_item_path, after_item_path, loader
-                )
+        # Collect the results in the order of the labels to keep the output stable
+        for image_id in image_id_to_paths:
+            results.result[image_id] = image_id_to_result[image_id]
 
         self._export_result(results, datasets_path)
         return results
 
-    def _check_intersection(
-        self, label1: label.LabelInfo, label2: label.LabelInfo
-    ) -> bool:
-        """Check if two bounding boxes with the same label intersect.
+    def _iter_results(
+        self,
+        image_id_to_paths: dict[dtypes.ImageId, tuple[pathlib.Path, pathlib.Path]],
+        loader: loader_base.ObjectDetectionDataLoaderBase,
+        max_workers: int | None,
+    ) -> collections.abc.Iterator[tuple[dtypes.ImageId, result.SinglePairResult]]:
+        """Run change detection on the pairs of label files.
 
-        If they have different labels, they are considered to not intersect.
+        Parameters
+        ----------
+        image_id_to_paths : dict[ImageId, tuple[pathlib.Path, pathlib.Path]]
+            Paths to the label files before and after the change of each image.
+        loader : ObjectDetectionDataLoaderBase
+            Loader for the object detection results.
+        max_workers : int | None
+            Maximum number of processes to detect changes in parallel.
+
+        Yields
+        ------
+        tuple[ImageId, SinglePairResult]
+            Image ID and the result of its pair, in the order of completion.
+        """
+        if max_workers == 1 or len(image_id_to_paths) < _MIN_PAIRS_FOR_PROCESSES:
+            for image_id, paths in image_id_to_paths.items():
+                yield image_id, self.run(*paths, loader)
+            return
+
+        # Only a limited number of pairs are in flight at a time. While the results of
+        # the completed pairs are collected, idle workers already read the labels of the
+        # next pairs.
+        window_size = 2 * (max_workers or os.cpu_count() or 1)
+        pending_pairs = iter(image_id_to_paths.items())
+        # NOTE: The workers are started by a fork server, since forking this process
+        #       directly is unsafe once libraries such as Polars or PyTorch have
+        #       started their thread pools.
+        with futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("forkserver"),
+        ) as executor:
+            future_to_image_id = {
+                executor.submit(self.run, *paths, loader): image_id
+                for image_id, paths in itertools.islice(pending_pairs, window_size)
+            }
+            while future_to_image_id:
+                done, _ = futures.wait(
+                    future_to_image_id, return_when=futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    yield future_to_image_id.pop(future), future.result()
+
+                    # Keep the window full
+                    if (next_pair := next(pending_pairs, None)) is not None:
+                        next_image_id, paths = next_pair
+                        next_future = executor.submit(self.run, *paths, loader)
+                        future_to_image_id[next_future] = next_image_id
+
+    def _compute_intersection_matrix(
+        self,
+        before_bounding_boxes: npt.NDArray[np.float32],
+        after_bounding_boxes: npt.NDArray[np.float32],
+    ) -> npt.NDArray[np.bool_]:
+        """Check if all pairs of bounding boxes intersect.
+
+        This is equivalent to checking if `BoundingBox.compute_iou()` is positive for
+        all pairs, but neither the intersected area nor the union is computed.
 
         Parameters
         ----------
-        label1 : LabelInfo
-            The first label.
-        label2 : LabelInfo
-            The second label.
+        before_bounding_boxes : np.ndarray, shape (N, 4)
+            Bounding boxes in the first image (before) in the format (x1, y1, x2, y2).
+        after_bounding_boxes : np.ndarray, shape (M, 4)
+            Bounding boxes in the second image (after) in the format (x1, y1, x2, y2).
 
         Returns
         -------
-        bool
-            True if the bounding boxes intersect, False otherwise.
+        np.ndarray, shape (N, M)
+            True if the i-th bounding box before the change intersects with the j-th
+            bounding box after the change, False otherwise.
+        """
+        # Shape (N, M, 2): top-left and bottom-right corners of the intersections
+        intersected_min = np.maximum(
+            before_bounding_boxes[:, None, :2], after_bounding_boxes[None, :, :2]
+        )
+        intersected_max = np.minimum(
+            before_bounding_boxes[:, None, 2:], after_bounding_boxes[None, :, 2:]
+        )
+
+        # The intersection is not empty only if it has positive width and height
+        return typing.cast(
+            "npt.NDArray[np.bool_]", (intersected_max > intersected_min).all(axis=-1)
+        )
+
+    def _find_intersections(
+        self,
+        before_bounding_boxes: list[list[float]],
+        after_bounding_boxes: list[list[float]],
+        before_indices: list[int],
+        after_indices: list[int],
+    ) -> typing.Generator[tuple[int, int], None, None]:
+        """Find intersecting pairs of bounding boxes with a plain loop.
+
+        This is the counterpart of `_compute_intersection_matrix()` for small groups
+        of bounding boxes.
+
+        Parameters
+        ----------
+        before_bounding_boxes : list[list[float]]
+            Bounding boxes in the first image (before) in the format (x1, y1, x2, y2).
+        after_bounding_boxes : list[list[float]]
+            Bounding boxes in the second image (after) in the format (x1, y1, x2, y2).
+        before_indices : list[int]
+            Indices of the bounding boxes before the change to compare.
+        after_indices : list[int]
+            Indices of the bounding boxes after the change to compare.
+
+        Yields
+        ------
+        tuple[int, int]
+            Indices of the bounding boxes before and after the change which intersect.
         """
-        if not label1.is_label_same(label2):
-            return False
+        for i in before_indices:
+            x1_min, y1_min, x1_max, y1_max = before_bounding_boxes[i]
+            for j in after_indices:
+                x2_min, y2_min, x2_max, y2_max = after_bounding_boxes[j]
+                if (
+                    x1_min < x2_max
+                    and x2_min < x1_max
+                    and y1_min < y2_max
+                    and y2_min < y1_max
+                ):
+                    yield i, j
+
+    def _check_label_consistency(
+        self, before_labels: _PackedLabels, after_labels: _PackedLabels
+    ) -> None:
+        """Check if labels before and after the change can be compared.
 
-        return label1.bounding_box.compute_iou(label2.bounding_box) > 0
+        Labels before the change are compared by `label_id` if they have one, and by
+        `label_name` otherwise. See `LabelInfo.is_label_same()`.
+
+        Parameters
+        ----------
+        before_labels : _PackedLabels
+            Labels in the first image (before).
+        after_labels : _PackedLabels
+            Labels in the second image (after).
+
+        Raises
+        ------
+        LabelInconsistentError
+            Raised when the labels are inconsistent. See `LabelInfo.is_label_same()`.
+        """
+        before_label_ids = [
+            label_id for label_id in before_labels.label_ids if label_id is not None
+        ]
+        if before_label_ids and None in after_labels.label_ids:
+            raise exceptions.LabelInconsistentError(
+                label_type="label_id", label1=before_label_ids[0], label2=None
+            )
+
+        before_label_names = [
+            label_name
+            for label_id, label_name in zip(
+                before_labels.label_ids, before_labels.label_names, strict=True
+            )
+            if label_id is None
+        ]
+        if before_label_names and None in after_labels.label_names:
+            raise exceptions.LabelInconsistentError(
+                label_type="label_name", label1=before_label_names[0], label2=None
+            )
+
+    def _group_by_label(
+        self, labels: typing.Iterable[label.LabelId | label.LabelName | None]
+    ) -> dict[label.LabelId | label.LabelName, npt.NDArray[np.intp]]:
+        """Group the indices of labels by their values.
+
+        Parameters
+        ----------
+        labels : Iterable[LabelId | LabelName | None]
+            Label identifiers or names. None values are ignored.
+
+        Returns
+        -------
+        dict[LabelId | LabelName, np.ndarray]
+            Mapping from each label to the indices where it appears.
+        """
+        label_to_indices: dict[label.LabelId | label.LabelName, list[int]] = (
+            collections.defaultdict(list)
+        )
+        for i, label_key in enumerate(labels):
+            if label_key is not None:
+                label_to_indices[label_key].append(i)
+        return {
+            label_key: np.array(indices, dtype=np.intp)
+            for label_key, indices in label_to_indices.items()
+        }
 
     def _compare_bounding_boxes(
         self, before_labels: list[label.LabelInfo], after_labels: list[label.LabelInfo]
@@ -173,30 +455,72 @@ class ChangeDetector:
         SingleResult
             Result of the change detection.
         """
-        detection_result = result.SinglePairResult(
-            added=set(), removed=set(), unchanged=set()
-        )
-        intersected_after_labels: set[label.LabelInfo] = set()
-
-        # Check if the bounding boxes in the first image (before) are present in the
-        # second image (after). If they are not, they are considered removed.
-        for before_label in before_labels:
-            for after_label in after_labels:
-                if not self._check_intersection(before_label, after_label):
+        before = _PackedLabels.from_labels(before_labels)
+        after = _PackedLabels.from_labels(after_labels)
+        self._check_label_consistency(before, after)
+
+        # Labels before the change are compared by `label_id` if they have one, and by
+        # `label_name` otherwise, in the same way as `LabelInfo.is_label_same()`.
+        label_groups = [
+            (
+                self._group_by_label(before.label_ids),
+                self._group_by_label(after.label_ids),
+            ),
+            (
+                self._group_by_label(
+                    label_name if label_id is None else None
+                    for label_id, label_name in zip(
+                        before.label_ids, before.label_names, strict=True
+                    )
+                ),
+                self._group_by_label(after.label_names),
+            ),
+        ]
+
+        # Only the bounding boxes with the same label are compared. Bounding boxes in
+        # the first image (before) which do not intersect with any bounding box in the
+        # second image (after) are considered removed, and vice versa for added
+        # bounding boxes.
+        is_unchanged = np.zeros(len(before_labels), dtype=np.bool_)
+        is_added = np.ones(len(after_labels), dtype=np.bool_)
+        before_xyxy = before.bounding_boxes.tolist()
+        after_xyxy = after.bounding_boxes.tolist()
+        for before_groups, after_groups in label_groups:
+            for label_key, before_indices in before_groups.items():
+                if (after_indices := after_groups.get(label_key)) is None:
                     continue
-                detection_result.unchanged.add(before_label)
-                intersected_after_labels.add(after_label)
-            if before_label not in detection_result.unchanged:
-                # If the loop completes without breaking, the bounding box is not
-                # present in the second image. Therefore, it is considered removed.
-                detection_result.removed.add(before_label)
 
-        # Check for added bounding boxes
-        for after_label in after_labels:
-            if after_label not in intersected_after_labels:
-                detection_result.added.add(after_label)
+                if len(before_indices) * len(after_indices) <= _MAX_PAIRS_FOR_LOOP:
+                    for i, j in self._find_intersections(
+                        before_xyxy,
+                        after_xyxy,
+                        before_indices.tolist(),
+                        after_indices.tolist(),
+                    ):
+                        is_unchanged[i] = True
+                        is_added[j] = False
+                    continue
 
-        return detection_result
+                is_intersected = self._compute_intersection_matrix(
+                    before.bounding_boxes[before_indices],
+                    after.bounding_boxes[after_indices],
+                )
+                is_unchanged[before_indices] |= is_intersected.any(axis=1)
+                is_added[after_indices] &= ~is_intersected.any(axis=0)
+
+        # NOTE: The labels are passed as lists so that each set is built, and each
+        # label is hashed, only once during the validation.
+        return result.SinglePairResult.model_validate(
+            {
+                "added": [after_labels[i] for i in np.flatnonzero(is_added).tolist()],
+                "removed": [
+                    before_labels[i] for i in np.flatnonzero(~is_unchanged).tolist()
+                ],
+                "unchanged": [
+                    before_labels[i] for i in np.flatnonzero(is_unchanged).tolist()
+                ],
+            }
+        )
 
     def _export_result(
         self, results: result.ChangeDetectionResults, datasets_path: pathlib.Path
@@ -211,7 +535,8 @@ class ChangeDetector:
             Path to the directory containing the datasets.
         """
         result_path = datasets_path / "change_detection_result.json"
-        with result_path.open("w") as f:
-            json.dump(results.model_dump(), f, indent=4)
+        # NOTE: `model_dump_json()` serializes in pydantic-core directly, without
+        # building an intermediate dictionary of Python objects
+        result_path.write_text(results.model_dump_json(indent=4))
 
         _LOGGER.info("Change detection results saved to %s", result_path)
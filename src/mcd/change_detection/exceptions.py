@@ -22,6 +22,10 @@ class LabelInconsistentError(Exception):
         label1: int | str | None,
         label2: int | str | None,
     ) -> None:
+        # NOTE: The arguments are passed to the base class, so that the exception can be
+        #       pickled back from a worker process
+        super().__init__(label_type, label1, label2)
+
         self._label_type: typing.Final[typing.Literal["label_id", "label_name"]] = (
             label_type
         )
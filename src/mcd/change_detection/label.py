@@ -52,14 +52,15 @@ class BoundingBox(pydantic.BaseModel, frozen=True, strict=True):
         """
         return self.width * self.height
 
-    @property
-    def xyxy(self) -> tuple[float, float, float, float]:
-        """Get the bounding box in the format (x1, y1, x2, y2).
+    _xyxy: tuple[float, float, float, float] = pydantic.PrivateAttr()
+    """The bounding box in the format (x1, y1, x2, y2)."""
 
-        Returns
-        -------
-        tuple[float, float, float, float]
-            The bounding box in the format (x1, y1, x2, y2).
+    @pydantic.model_validator(mode="after")
+    def _compute_xyxy(self) -> typing.Self:
+        """Compute the bounding box in the format (x1, y1, x2, y2).
+
+        Since the model is frozen, the corners are computed only once at construction
+        and reused by `xyxy`.
         """
         x1 = self.x - self.width / 2
         y1 = self.y - self.height / 2
@@ -78,7 +79,21 @@ class BoundingBox(pydantic.BaseModel, frozen=True, strict=True):
             warnings.warn(f"Bounding box x2 is greater than 1 ({x2}).", stacklevel=2)
         if y2 > 1 + epsilon:
             warnings.warn(f"Bounding box y2 is greater than 1 ({y2}).", stacklevel=2)
-        return x1, y1, x2, y2
+
+        # NOTE: Private attributes can be assigned even though the model is frozen.
+        self._xyxy = (x1, y1, x2, y2)  # type: ignore[misc]
+        return self
+
+    @property
+    def xyxy(self) -> tuple[float, float, float, float]:
+        """Get the bounding box in the format (x1, y1, x2, y2).
+
+        Returns
+        -------
+        tuple[float, float, float, float]
+            The bounding box in the format (x1, y1, x2, y2).
+        """
+        return self._xyxy
 
     def compute_iou(self, other: typing.Self) -> float:
         """Compute the Intersection over Union (IoU) with another bounding box.
@@ -133,12 +148,22 @@ class LabelInfo(pydantic.BaseModel, frozen=True, strict=True):
     bounding_box: BoundingBox
     """Bounding box of the label."""
 
+    _label_key: LabelId | LabelName = pydantic.PrivateAttr()
+    """Key used to compare labels: `label_id` if provided, `label_name` otherwise."""
+
     @pydantic.model_validator(mode="after")
     def _check_if_label_is_provided(self) -> typing.Self:
         """Check if either `label_id` or `label_name` is provided."""
-        if self.label_id is None and self.label_name is None:
+        if self.label_id is not None:
+            label_key: LabelId | LabelName = self.label_id
+        elif self.label_name is not None:
+            label_key = self.label_name
+        else:
             msg = "Either `label_id` or `label_name` must be provided."
             raise ValueError(msg)
+
+        # NOTE: Private attributes can be assigned even though the model is frozen.
+        self._label_key = label_key  # type: ignore[misc]
         return self
 
     def is_label_same(self, other: typing.Self) -> bool:
@@ -163,6 +188,11 @@ class LabelInfo(pydantic.BaseModel, frozen=True, strict=True):
             - `label_id` is present in either label but not in the other.
             - `label_name` is present in either label but not in the other.
         """
+        # Since `LabelId` and `LabelName` are different types, equal keys always mean
+        # the labels are the same and consistent
+        if self._label_key == other._label_key:
+            return True
+
         if self.label_id is not None:
             if other.label_id is None:
                 raise exceptions.LabelInconsistentError(
@@ -1,5 +1,7 @@
 """Camera data type."""
 
+import functools
+
 import numpy as np
 import pydantic
 
@@ -32,3 +34,21 @@ class Camera(
 
     The transformation from world coordinates to camera coordinates.
     """
+
+    @functools.cached_property
+    def inverse_intrinsic(self) -> _array.NpArray3x3Type[np.float32]:
+        """Inverse of the intrinsic matrix.
+
+        The transformation from image coordinates to camera coordinates. Since the
+        camera is immutable, the inverse is computed only once.
+        """
+        return np.linalg.inv(self.intrinsic)
+
+    @functools.cached_property
+    def inverse_view_matrix(self) -> _array.NpArray4x4Type[np.float32]:
+        """Inverse of the view matrix.
+
+        The transformation from camera coordinates to world coordinates. Since the
+        camera is immutable, the inverse is computed only once.
+        """
+        return np.linalg.inv(self.view_matrix)
@@ -1,19 +1,57 @@
 """Data loader for source data captured by ARKit."""
 
-import json
+import collections
+import functools
+import itertools
+import os
 import pathlib
 import typing
+from concurrent import futures
 
 import cv2
 import numpy as np
+import numpy.typing as npt
 import pydantic
 
 from mcd import dtypes
 from mcd.loader import base
 from mcd.utils import arkit
 
+_PREFETCH_SIZE: typing.Final[int] = 4
+"""Number of frames loaded ahead in the background while iterating over a dataset."""
 
-class _ArkitDepthMap(pydantic.BaseModel, frozen=True, strict=True):
+
+def _has_element_types(
+    values: object, element_types: frozenset[type], dtype_kinds: str
+) -> bool:
+    """Check if the values are a list or an array of the given element types.
+
+    Only the types of the decoded elements are compared, instead of validating each
+    element with Pydantic, since a map has tens of thousands of values.
+
+    Parameters
+    ----------
+    values : object
+        Values to check.
+    element_types : frozenset[type]
+        Allowed types of the elements of a list. Subclasses such as `bool` are not
+        allowed unless listed.
+    dtype_kinds : str
+        Allowed kinds of the data type of an array.
+
+    Returns
+    -------
+    bool
+        True if the values have the allowed types, False otherwise.
+    """
+    if isinstance(values, np.ndarray):
+        return values.dtype.kind in dtype_kinds
+    return isinstance(values, list) and set(map(type, values)) <= element_types
+
+
+class _ArkitDepthMap(
+    pydantic.BaseModel, frozen=True, strict=True, arbitrary_types_allowed=True
+):
     """Depth map captured by ARKit.
 
     Attributes
@@ -22,7 +60,7 @@ class _ArkitDepthMap(pydantic.BaseModel, frozen=True, strict=True):
         Height of the depth map.
     width : pydantic.PositiveInt
         Width of the depth map.
-    values : list[pydantic.NonNegativeFloat]
+    values : npt.NDArray[np.float32]
         Flattened values of the depth map.
     """
 
@@ -32,9 +70,29 @@ class _ArkitDepthMap(pydantic.BaseModel, frozen=True, strict=True):
     width: pydantic.PositiveInt
     """Width of the depth map."""
 
-    values: list[pydantic.NonNegativeFloat]
+    values: npt.NDArray[np.float32]
     """Flattened values of the depth map."""
 
+    @pydantic.field_validator("values", mode="before")
+    @classmethod
+    def _validate_values(cls, values: list[float]) -> npt.NDArray[np.float32]:
+        """Validate the values of the depth map.
+
+        The values are converted to a NumPy array at once instead of validating each
+        value as a Python float, since a depth map has tens of thousands of values.
+        """
+        if not _has_element_types(values, frozenset((float, int)), "fiu"):
+            message = "Depth values must be numbers."
+            raise ValueError(message)
+
+        values_array = np.asarray(values, dtype=np.float32)
+        # NOTE: Comparisons with NaN are always false, so NaN is rejected only when
+        #       checking that every value is non-negative
+        if not (values_array >= 0).all():
+            message = "Depth values must be non-negative."
+            raise ValueError(message)
+        return values_array
+
     def to_numpy(self) -> dtypes.GrayscaleImageType[np.float32]:
         """Convert the depth map to a NumPy array.
 
@@ -43,12 +101,16 @@ class _ArkitDepthMap(pydantic.BaseModel, frozen=True, strict=True):
         dtypes.GrayscaleImageType[np.float32]
             Depth map.
         """
-        depth_map = np.array(self.values).reshape(self.height, self.width)
+        depth_map = self.values.reshape(self.height, self.width)
         # ARKit depth maps are rotated 90 degrees clockwise
-        return cv2.rotate(depth_map, cv2.ROTATE_90_CLOCKWISE).astype(np.float32)
+        return cv2.rotate(depth_map, cv2.ROTATE_90_CLOCKWISE).astype(
+            np.float32, copy=False
+        )
 
 
-class _ArkitConfidenceMap(pydantic.BaseModel, frozen=True, strict=True):
+class _ArkitConfidenceMap(
+    pydantic.BaseModel, frozen=True, strict=True, arbitrary_types_allowed=True
+):
     """Confidence map captured by ARKit.
 
     Attributes
@@ -57,8 +119,8 @@ class _ArkitConfidenceMap(pydantic.BaseModel, frozen=True, strict=True):
         Height of the confidence map.
     width : pydantic.PositiveInt
         Width of the confidence map.
-    values : list[typing.Literal[0, 1, 2]]
-        Values of the confidence map.
+    values : npt.NDArray[np.uint8]
+        Values of the confidence map, each of which is 0, 1, or 2.
     """
 
     height: pydantic.PositiveInt
@@ -67,8 +129,22 @@ class _ArkitConfidenceMap(pydantic.BaseModel, frozen=True, strict=True):
     width: pydantic.PositiveInt
     """Width of the confidence map."""
 
-    values: list[typing.Literal[0, 1, 2]]
-    """Values of the confidence map."""
+    values: npt.NDArray[np.uint8]
+    """Values of the confidence map, each of which is 0, 1, or 2."""
+
+    @pydantic.field_validator("values", mode="before")
+    @classmethod
+    def _validate_values(cls, values: list[int]) -> npt.NDArray[np.uint8]:
+        """Validate the values of the confidence map."""
+        if not _has_element_types(values, frozenset((int,)), "iu"):
+            message = "Confidence values must be integers."
+            raise ValueError(message)
+
+        values_array = np.asarray(values)
+        if not np.isin(values_array, (0, 1, 2)).all():
+            message = "Confidence values must be 0, 1, or 2."
+            raise ValueError(message)
+        return values_array.astype(np.uint8)
 
 
 class ArkitFrame(dtypes.Camera, frozen=True, strict=True):
@@ -121,7 +197,9 @@ class ArkitFrame(dtypes.Camera, frozen=True, strict=True):
         """Validate the view matrix."""
         if isinstance(view_matrix, np.ndarray):
             return view_matrix
-        return np.array(view_matrix).squeeze().T
+        # NOTE: The matrix is stored in column-major order, so reading it in Fortran
+        # order makes the transpose a C-contiguous view without another copy
+        return np.array(view_matrix, dtype=np.float32, order="F").squeeze().T
 
     @pydantic.field_validator("intrinsic", mode="before")
     @classmethod
@@ -131,7 +209,87 @@ class ArkitFrame(dtypes.Camera, frozen=True, strict=True):
         """Validate the intrinsic matrix."""
         if isinstance(intrinsic, np.ndarray):
             return intrinsic
-        return np.array(intrinsic).squeeze().T
+        # NOTE: Column-major as in `_validate_view_matrix()`
+        return np.array(intrinsic, dtype=np.float32, order="F").squeeze().T
+
+
+def _read_image(path: pathlib.Path, flags: int) -> npt.NDArray[np.uint8] | None:
+    """Read an 8-bit image from a file.
+
+    The file is read into memory first and then decoded, so that the path does not go
+    through OpenCV, which cannot open non-ASCII paths on some platforms.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        Path to the image file.
+    flags : int
+        Flags passed to `cv2.imdecode()`, such as `cv2.IMREAD_GRAYSCALE`.
+
+    Returns
+    -------
+    npt.NDArray[np.uint8] | None
+        Image, or None if the file does not exist or cannot be decoded.
+    """
+    try:
+        buffer = np.fromfile(path, dtype=np.uint8)
+    except FileNotFoundError:
+        return None
+
+    # NOTE: `cv2.imdecode()` fails on an empty buffer instead of returning None
+    if buffer.size == 0 or (image := cv2.imdecode(buffer, flags)) is None:
+        return None
+    # NOTE: `cv2.imdecode()` already returns an 8-bit image for these flags, so
+    #       `astype()` does not copy
+    return image.astype(np.uint8, copy=False)
+
+
+def load_frame(path: pathlib.Path) -> ArkitFrame:
+    """Load frame data captured by ARKit.
+
+    The depth map and the camera parameters of an image are stored in the same file and
+    are loaded one after the other, so the last parsed frames are cached. The cache is
+    keyed on the modification time of the file as well, so an edited file is parsed
+    again.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        Path to the JSON file of the frame.
+
+    Returns
+    -------
+    ArkitFrame
+        Frame data.
+    """
+    return _load_frame(path, path.stat().st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=_PREFETCH_SIZE)
+def _load_frame(path: pathlib.Path, modified_time_ns: int) -> ArkitFrame:
+    """Load frame data captured by ARKit.
+
+    The cache holds as many frames as can be loaded concurrently, so that a frame is not
+    evicted by the others in between.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        Path to the JSON file of the frame.
+    modified_time_ns : int
+        Modification time of `path` in nanoseconds. It is only used as a part of the
+        cache key.
+
+    Returns
+    -------
+    ArkitFrame
+        Frame data.
+    """
+    del modified_time_ns
+
+    # NOTE: Pydantic parses the JSON in Rust, which is several times faster than
+    #       `json.load()` followed by `model_validate()` for the large depth maps
+    return ArkitFrame.model_validate_json(path.read_bytes())
 
 
 class ArkitImageLoader(base.ImageLoaderBase):
@@ -166,10 +324,8 @@ class ArkitImageLoader(base.ImageLoaderBase):
     def __init__(self, dataset_path: pathlib.Path) -> None:
         super().__init__(dataset_path, correction_matrix=arkit.ARKIT_MATRIX)
 
-        self._size: typing.Final[int] = sum(
-            1 for _ in self._dataset_path.glob("images/*.png")
-        )
-        """Number of images in the dataset."""
+        self._image_ids: typing.Final[list[dtypes.ImageId]] = self._scan_image_ids()
+        """Identifiers of the images in the dataset in chronological order."""
 
     def __len__(self) -> int:
         """Get the number of images in the dataset.
@@ -179,7 +335,7 @@ class ArkitImageLoader(base.ImageLoaderBase):
         int
             Number of images.
         """
-        return self._size
+        return len(self._image_ids)
 
     def __iter__(
         self,
@@ -205,19 +361,56 @@ class ArkitImageLoader(base.ImageLoaderBase):
         ]
             Image ID, image, depth map, and confidence map.
         """
+        # The next frames are loaded in the background while the current one is being
+        # processed. Decoding images and parsing files mostly release the GIL.
+        executor = futures.ThreadPoolExecutor(max_workers=_PREFETCH_SIZE)
+        try:
+            pending_image_ids = iter(self._image_ids)
+            pending_frames = collections.deque(
+                (image_id, executor.submit(self.__getitem__, image_id))
+                for image_id in itertools.islice(pending_image_ids, _PREFETCH_SIZE)
+            )
+            while pending_frames:
+                image_id, frame = pending_frames.popleft()
+                if (next_image_id := next(pending_image_ids, None)) is not None:
+                    pending_frames.append(
+                        (
+                            next_image_id,
+                            executor.submit(self.__getitem__, next_image_id),
+                        )
+                    )
+                yield (image_id, *frame.result())
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def _scan_image_ids(self) -> list[dtypes.ImageId]:
+        """Scan the identifiers of the images in the dataset.
+
+        The directory is listed once with `os.scandir()`, which does not create a path
+        object nor stat each entry, unlike `pathlib.Path.glob()`.
+
+        Returns
+        -------
+        list[dtypes.ImageId]
+            Identifiers of the images in chronological order.
+        """
+        images_path = self._dataset_path / "images"
+        if not images_path.is_dir():
+            return []
+
+        with os.scandir(images_path) as entries:
+            image_ids = [
+                entry.name.removesuffix(".png")
+                for entry in entries
+                if entry.name.endswith(".png") and entry.is_file()
+            ]
+
         # Sort the image IDs in chronological order, in other words, natural sorting.
-        image_ids = sorted(
-            [path.stem for path in self._dataset_path.glob("images/*.png")],
-            key=lambda x: int(x.split("_")[-1]),
+        # The frame numbers are parsed once and sorted by NumPy.
+        frame_numbers = np.array(
+            [int(image_id.rpartition("_")[2]) for image_id in image_ids], dtype=np.int64
         )
-        for image_id in image_ids:
-            yield (
-                image_id,
-                self._load_image(image_id),
-                self._load_depth_map(image_id),
-                self._get_confidence_map(image_id),
-                self._load_camera_parameters(image_id),
-            )
+        return [image_ids[i] for i in np.argsort(frame_numbers, kind="stable").tolist()]
 
     def _load_image(
         self, image_id: dtypes.ImageId
@@ -233,10 +426,16 @@ class ArkitImageLoader(base.ImageLoaderBase):
         -------
         dtypes.ColoredImageType[np.uint8]
             Image.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the image cannot be read.
         """
         path = self._dataset_path / "images" / f"{image_id}.png"
-        image = cv2.imread(path.as_posix())
-        return image.astype(np.uint8)
+        if (image := _read_image(path, cv2.IMREAD_COLOR)) is None:
+            raise FileNotFoundError(path)
+        return image
 
     def _load_depth_map(
         self, image_id: dtypes.ImageId
@@ -253,15 +452,17 @@ class ArkitImageLoader(base.ImageLoaderBase):
         dtypes.GrayscaleImageType[np.float32]
             Loaded depth map.
         """
-        path = self._dataset_path / "depth" / f"{image_id}.json"
-        with path.open("r") as file:
-            frame = ArkitFrame.model_validate(json.load(file))
+        frame = load_frame(self._dataset_path / "depth" / f"{image_id}.json")
         depth_map = frame.depth_map.to_numpy()
 
-        # ARKit depth maps are smaller than the image resolution
+        # ARKit depth maps are smaller than the image resolution. The nearest value is
+        # used so that depths are not blended across the edges of objects.
+        # NOTE: `cv2.resize()` keeps the data type, so `astype()` does not copy
         return cv2.resize(
-            depth_map, (int(frame.resolution[1]), int(frame.resolution[0]))
-        ).astype(np.float32)
+            depth_map,
+            (int(frame.resolution[1]), int(frame.resolution[0])),
+            interpolation=cv2.INTER_NEAREST,
+        ).astype(np.float32, copy=False)
 
     def _get_confidence_map(
         self, image_id: dtypes.ImageId
@@ -279,13 +480,14 @@ class ArkitImageLoader(base.ImageLoaderBase):
             Confidence map or None if not available.
         """
         path = self._dataset_path / "confidence" / f"{image_id}.png"
-        confidence_map = cv2.imread(path.as_posix(), cv2.IMREAD_GRAYSCALE)
+        confidence_map = _read_image(path, cv2.IMREAD_GRAYSCALE)
         if confidence_map is None:
             return None
 
         # NOTE: The confidence map has an extra column at the end for some reason.
-        #       We remove it here.
-        return confidence_map[:, :-1].astype(np.uint8)
+        #       We remove it here, copying the strided view once to make it
+        #       contiguous.
+        return np.ascontiguousarray(confidence_map[:, :-1])
 
     def _load_camera_parameters(self, image_id: dtypes.ImageId) -> dtypes.Camera:
         """Load the camera parameters of an image.
@@ -300,7 +502,5 @@ class ArkitImageLoader(base.ImageLoaderBase):
         dtypes.Camera
             Camera parameters.
         """
-        path = self._dataset_path / "depth" / f"{image_id}.json"
-        with path.open("r") as file:
-            frame = ArkitFrame.model_validate(json.load(file))
+        frame = load_frame(self._dataset_path / "depth" / f"{image_id}.json")
         return dtypes.Camera(intrinsic=frame.intrinsic, view_matrix=frame.view_matrix)
@@ -1,6 +1,5 @@
 """Change detection loader for ARKit and Unreal Engine 5."""
 
-import json
 import pathlib
 
 import cv2
@@ -95,7 +94,13 @@ class ArkitUe5RefinementDataLoader(base.RefinementDataLoaderBase):
         dtypes.GrayscaleImageType[np.float32]
             Depth map.
         """
-        dataframe = pl.read_csv(depth_path, has_header=False)
+        # The columns are parsed as float32 directly, instead of inferring float64 and
+        # converting the whole depth map afterwards
+        with depth_path.open("r") as file:
+            num_columns = file.readline().count(",") + 1
+        dataframe = pl.read_csv(
+            depth_path, has_header=False, schema_overrides=[pl.Float32] * num_columns
+        )
         return dataframe.to_numpy().squeeze()
 
     def _get_depth_map_from_json(
@@ -113,14 +118,17 @@ class ArkitUe5RefinementDataLoader(base.RefinementDataLoaderBase):
         dtypes.GrayscaleImageType[np.float32]
             Depth map.
         """
-        with depth_path.open("r") as file:
-            frame = arkit_loader.ArkitFrame.model_validate(json.load(file))
+        frame = arkit_loader.load_frame(depth_path)
         depth_map = frame.depth_map.to_numpy()
 
-        # ARKit depth maps are smaller than the image resolution
+        # ARKit depth maps are smaller than the image resolution. The nearest value is
+        # used so that depths are not blended across the edges of objects.
+        # NOTE: `cv2.resize()` keeps the data type, so `astype()` does not copy
         return cv2.resize(
-            depth_map, (int(frame.resolution[1]), int(frame.resolution[0]))
-        ).astype(np.float32)
+            depth_map,
+            (int(frame.resolution[1]), int(frame.resolution[0])),
+            interpolation=cv2.INTER_NEAREST,
+        ).astype(np.float32, copy=False)
 
     def get_depth_map(
         self, depth_path: pathlib.Path
@@ -187,6 +195,5 @@ class ArkitUe5RefinementDataLoader(base.RefinementDataLoaderBase):
         _, depth_path_after = self.get_depth_map_path_pair(
             datasets_path, image_id, before_name
         )
-        with depth_path_after.open("r") as file:
-            frame = arkit_loader.ArkitFrame.model_validate(json.load(file))
+        frame = arkit_loader.load_frame(depth_path_after)
         return dtypes.Camera(intrinsic=frame.intrinsic, view_matrix=frame.view_matrix)
@@ -1,6 +1,8 @@
 """Abstraction layer for data loaders."""
 
 import abc
+import functools
+import os
 import pathlib
 import typing
 
@@ -38,18 +40,59 @@ class _DataLoaderBase:
         AfterDatasetNotFoundError
             If the 'after' dataset is not found.
         """
-        after_name = ""
-        for dataset_path in datasets_path.iterdir():
-            if not dataset_path.is_dir():
-                continue
-            if dataset_path.stem == before_name:
+        # NOTE: The modification time of the directory changes when a dataset is added,
+        #       removed, or renamed, so that a cached name is not used afterwards
+        after_name = _find_after_dataset_name(
+            datasets_path, before_name, datasets_path.stat().st_mtime_ns
+        )
+        return datasets_path / after_name
+
+
+@functools.lru_cache(maxsize=32)
+def _find_after_dataset_name(
+    datasets_path: pathlib.Path, before_name: str, modified_time_ns: int
+) -> str:
+    """Find the name of the 'after' dataset.
+
+    The result is cached, since the path is looked up for every image while refining.
+
+    Parameters
+    ----------
+    datasets_path : pathlib.Path
+        Path to the directory containing the datasets.
+    before_name : str
+        Name of the dataset that represents the scene before the change.
+    modified_time_ns : int
+        Modification time of `datasets_path` in nanoseconds. It is only used as a part
+        of the cache key.
+
+    Returns
+    -------
+    str
+        Name of the 'after' dataset.
+
+    Raises
+    ------
+    TooManyDatasetsError
+        If more than two datasets are present in the directory.
+    AfterDatasetNotFoundError
+        If the 'after' dataset is not found.
+    """
+    del modified_time_ns
+
+    # NOTE: `os.scandir()` does not create a path object for each entry, and the entry
+    #       type is usually known without another system call
+    after_name: str | None = None
+    with os.scandir(datasets_path) as entries:
+        for entry in entries:
+            if not entry.is_dir() or entry.name == before_name:
                 continue
-            if len(after_name) > 0:
+            if after_name is not None:
                 raise exceptions.TooManyDatasetsError
-            after_name = dataset_path.stem
-        if len(after_name) == 0:
-            raise exceptions.AfterDatasetNotFoundError
-        return datasets_path / after_name
+            after_name = entry.name
+    if after_name is None:
+        raise exceptions.AfterDatasetNotFoundError
+    return after_name
 
 
 class ImageLoaderBase(abc.ABC, _DataLoaderBase):
@@ -1,11 +1,19 @@
 """Data loader for object detection results created by YOLO."""
 
+import os
 import pathlib
 import typing
 
+import pydantic
+
 from mcd.change_detection import label
 from mcd.loader import base
 
+_LABELS_ADAPTER: typing.Final[pydantic.TypeAdapter[list[label.LabelInfo]]] = (
+    pydantic.TypeAdapter(list[label.LabelInfo])
+)
+"""Type adapter to validate the labels read from a file."""
+
 
 class YoloObjectDetectionDataLoader(base.ObjectDetectionDataLoaderBase):
     """Data loader for object detection results created by YOLO."""
@@ -38,8 +46,10 @@ class YoloObjectDetectionDataLoader(base.ObjectDetectionDataLoaderBase):
         pathlib.Path
             Path to the image.
         """
-        for file_path in dataset_path.iterdir():
-            yield from file_path.glob("*.jpg")
+        with os.scandir(dataset_path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    yield from _scan_files(entry.path, ".jpg")
 
     def get_labels_path(
         self, dataset_path: pathlib.Path
@@ -69,8 +79,10 @@ class YoloObjectDetectionDataLoader(base.ObjectDetectionDataLoaderBase):
         pathlib.Path
             Path to the label.
         """
-        for file_path in dataset_path.iterdir():
-            yield from (file_path / "labels").glob("*.txt")
+        with os.scandir(dataset_path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    yield from _scan_files(pathlib.Path(entry.path, "labels"), ".txt")
 
     def read_labels(self, path: pathlib.Path) -> list[label.LabelInfo]:
         """Read labels from a file.
@@ -85,20 +97,53 @@ class YoloObjectDetectionDataLoader(base.ObjectDetectionDataLoaderBase):
         list[label.LabelInfo]
             Labels read from the file.
         """
-        labels: list[label.LabelInfo] = []
+        raw_labels: list[dict[str, typing.Any]] = []
         with path.open("r") as file:
             for line in file:
                 _label, x, y, width, height = line.split()
-                labels.append(
-                    label.LabelInfo(
-                        label_id=int(_label) if _label.isdigit() else None,
-                        label_name=_label if not _label.isdigit() else None,
-                        bounding_box=label.BoundingBox(
-                            x=float(x),
-                            y=float(y),
-                            width=float(width),
-                            height=float(height),
-                        ),
-                    )
+                is_label_id = _label.isdigit()
+                raw_labels.append(
+                    {
+                        "label_id": int(_label) if is_label_id else None,
+                        "label_name": None if is_label_id else _label,
+                        "bounding_box": {
+                            "x": float(x),
+                            "y": float(y),
+                            "width": float(width),
+                            "height": float(height),
+                        },
+                    }
                 )
-        return labels
+
+        # The labels are validated at once, instead of calling Pydantic for each label
+        # and each bounding box
+        return _LABELS_ADAPTER.validate_python(raw_labels)
+
+
+def _scan_files(
+    directory: str | pathlib.Path, suffix: str
+) -> typing.Generator[pathlib.Path, None, None]:
+    """Scan the files with a suffix in a directory.
+
+    `os.scandir()` is used instead of `pathlib.Path.glob()`, since it does not create a
+    path object for each entry, and the directory is scanned only once.
+
+    Parameters
+    ----------
+    directory : str | pathlib.Path
+        Path to the directory. Nothing is yielded if the directory does not exist.
+    suffix : str
+        Suffix of the files, such as ".jpg".
+
+    Yields
+    ------
+    pathlib.Path
+        Path to the file.
+    """
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(suffix):
+                    yield pathlib.Path(entry.path)
+    except FileNotFoundError:
+        return
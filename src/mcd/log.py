@@ -19,14 +19,17 @@ def setup_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
     logger.propagate = False
 
-    for handler in logger.handlers:
+    # NOTE: The handlers are copied, since removing them while iterating over the list
+    #       skips every other handler
+    for handler in list(logger.handlers):
         logger.removeHandler(handler)
         handler.close()
 
-    logger.setLevel(logging.DEBUG)
+    # The level is set on the logger rather than on the handler, so that debug messages
+    # are discarded before a log record is created
+    logger.setLevel(logging.INFO)
 
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(
         logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
     )
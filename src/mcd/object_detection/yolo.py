@@ -2,13 +2,16 @@
 
 import itertools
 import logging
+import os
 import pathlib
 import typing
+from concurrent import futures
 
 import cv2
 import numpy as np
 import ultralytics
 from rich import progress
+from ultralytics.engine import results as yolo_results
 
 from mcd import dtypes, log
 from mcd.object_detection import base
@@ -16,6 +19,15 @@ from mcd.object_detection import base
 _LOGGER: typing.Final[logging.Logger] = log.setup_logger(__name__)
 """Logger for this module."""
 
+_BATCH_SIZE: typing.Final[int] = 16
+"""Number of images detected at once by `YoloObjectDetector.detect_all()`."""
+
+_NUM_READ_WORKERS: typing.Final[int] = 4
+"""Number of threads reading the images of the next batch in the background."""
+
+_NUM_WRITE_WORKERS: typing.Final[int] = 2
+"""Number of threads saving the results of the previous batch in the background."""
+
 
 class YoloObjectDetector(base.ObjectDetectorBase):
     """YOLO object detection model.
@@ -24,12 +36,21 @@ class YoloObjectDetector(base.ObjectDetectorBase):
     ----------
     model_path : pathlib.Path
         Path to the YOLO model file.
+    half_precision : bool, default False
+        Whether to run the inference in half precision (FP16). This is only effective
+        on GPUs and ignored on CPUs. The detected boxes may differ slightly from those
+        in full precision.
     """
 
-    def __init__(self, model_path: pathlib.Path) -> None:
+    def __init__(
+        self, model_path: pathlib.Path, *, half_precision: bool = False
+    ) -> None:
         self._model_path: typing.Final[pathlib.Path] = model_path
         """Path to the YOLO model file."""
 
+        self._half_precision: typing.Final[bool] = half_precision
+        """Whether to run the inference in half precision (FP16)."""
+
         self._model: typing.Final[ultralytics.YOLO] = ultralytics.YOLO(model_path)
         """YOLO model."""
 
@@ -66,29 +87,11 @@ class YoloObjectDetector(base.ObjectDetectorBase):
             Path where the results will be saved.
         """
         result = self._model.predict(
-            source=image,
-            project=(results_path / dataset_id).as_posix(),
-            name=image_id,
-            save=True,
-            save_txt=True,
-            exist_ok=True,
-            verbose=False,
+            source=image, half=self._half_precision, verbose=False
         )[0]
-
-        # YOLO saves the results with the name `image0` by default, e.g., `image0.jpg`,
-        # `image0.txt`. For consistency, we rename these files to match the image ID.
-        result_path = results_path / dataset_id / image_id
-        for file_path in itertools.chain(
-            result_path.glob("image0.*"), result_path.glob("labels/image0.*")
-        ):
-            new_file_name = f"{image_id}{file_path.suffix}"
-            _LOGGER.debug("Renaming %s to %s.", file_path, new_file_name)
-            file_path.rename(file_path.parent / new_file_name)
-
-        if (boxes := result.boxes) is None or len(boxes.cls) == 0:
-            _LOGGER.debug("No objects detected in image %s.", image_id)
-            return
-        _LOGGER.debug("Detected %d objects in image %s.", len(boxes.cls), image_id)
+        self._save_result(
+            result, image_id=image_id, result_path=results_path / dataset_id / image_id
+        )
 
     def detect_all(
         self, dataset_path: pathlib.Path, results_path: pathlib.Path
@@ -131,24 +134,172 @@ class YoloObjectDetector(base.ObjectDetectorBase):
         results_path : pathlib.Path
             Path to save the results.
         """
-        image_paths = list(dataset_path.glob("images/*.png"))
+        image_paths = _scan_image_paths(dataset_path / "images")
+        dataset_results_path = results_path / dataset_path.name
 
-        with progress.Progress() as progress_bar:
+        # The results are saved in the background while the next batch is detected
+        with (
+            progress.Progress() as progress_bar,
+            futures.ThreadPoolExecutor(max_workers=_NUM_WRITE_WORKERS) as writer,
+        ):
             task = progress_bar.add_task(
                 "[cyan]Detecting objects", total=len(image_paths)
             )
 
-            for i, image_path in enumerate(image_paths):
-                progress_bar.update(
-                    task,
-                    advance=1,
-                    description=f"[green]Detecting objects[/green] in {image_path.name}"
-                    f" ({i + 1}/{len(image_paths)})",
+            i = 0
+            pending_saves: list[futures.Future[None]] = []
+            for batch_paths, images in _read_image_batches(image_paths):
+                results = self._model.predict(
+                    source=images, half=self._half_precision, verbose=False
                 )
 
-                self.detect(
-                    image=cv2.imread(image_path.as_posix()).astype(np.uint8),
-                    dataset_id=dataset_path.name,
-                    image_id=image_path.stem,
-                    results_path=results_path,
-                )
+                # Wait for the previous batch, so that at most two batches of results
+                # are kept in memory. This also raises an error that occurred in saving.
+                for save in pending_saves:
+                    save.result()
+                pending_saves.clear()
+
+                for image_path, result in zip(batch_paths, results, strict=True):
+                    i += 1
+                    progress_bar.update(
+                        task,
+                        advance=1,
+                        description=f"[green]Detecting objects[/green] in "
+                        f"{image_path.name} ({i}/{len(image_paths)})",
+                    )
+
+                    pending_saves.append(
+                        writer.submit(
+                            self._save_result,
+                            result,
+                            image_id=image_path.stem,
+                            result_path=dataset_results_path / image_path.stem,
+                        )
+                    )
+
+            for save in pending_saves:
+                save.result()
+
+    def _save_result(
+        self, result: yolo_results.Results, image_id: str, result_path: pathlib.Path
+    ) -> None:
+        """Save the result of an image in the same structure as `detect()`.
+
+        Parameters
+        ----------
+        result : yolo_results.Results
+            Detection result of the image.
+        image_id : str
+            Identifier of the image.
+        result_path : pathlib.Path
+            Path to the directory of the image in the results.
+        """
+        labels_path = result_path / "labels"
+        labels_path.mkdir(parents=True, exist_ok=True)
+        result.save(filename=(result_path / f"{image_id}.jpg").as_posix())
+
+        label_path = labels_path / f"{image_id}.txt"
+        if (boxes := result.boxes) is None or len(boxes.cls) == 0:
+            # Like YOLO, no label file is written if no objects are detected, so the
+            # file of a previous run is removed
+            label_path.unlink(missing_ok=True)
+            _LOGGER.debug("No objects detected in image %s.", image_id)
+            return
+
+        # The labels are copied from the device at once and written in the same format
+        # as `Results.save_txt()`, which formats each box in Python
+        boxes = boxes.cpu().numpy()
+        np.savetxt(label_path, np.column_stack((boxes.cls, boxes.xywhn)), fmt="%g")
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Detected %d objects in image %s.", len(boxes.cls), image_id)
+
+
+def _scan_image_paths(images_path: pathlib.Path) -> list[pathlib.Path]:
+    """Scan the paths to the PNG images in a directory.
+
+    The directory is listed once with `os.scandir()`, which does not create a path
+    object nor stat each entry, unlike `pathlib.Path.glob()`.
+
+    Parameters
+    ----------
+    images_path : pathlib.Path
+        Path to the directory containing the images.
+
+    Returns
+    -------
+    list[pathlib.Path]
+        Paths to the images, or an empty list if the directory does not exist.
+    """
+    if not images_path.is_dir():
+        return []
+
+    with os.scandir(images_path) as entries:
+        return [
+            pathlib.Path(entry.path) for entry in entries if entry.name.endswith(".png")
+        ]
+
+
+def _read_image(image_path: pathlib.Path) -> dtypes.ColoredImageType[np.uint8]:
+    """Read an image.
+
+    Parameters
+    ----------
+    image_path : pathlib.Path
+        Path to the image.
+
+    Returns
+    -------
+    dtypes.ColoredImageType[np.uint8]
+        Image.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the image cannot be read.
+    """
+    # NOTE: The images are captured frames without an EXIF orientation, so looking for
+    #       it is skipped
+    flags = cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION
+    if (image := cv2.imread(image_path.as_posix(), flags)) is None:
+        raise FileNotFoundError(image_path)
+    # NOTE: `cv2.imread()` already returns an 8-bit image, so `astype()` does not copy
+    return image.astype(np.uint8, copy=False)
+
+
+def _read_image_batches(
+    image_paths: list[pathlib.Path],
+) -> typing.Generator[
+    tuple[tuple[pathlib.Path, ...], list[dtypes.ColoredImageType[np.uint8]]], None, None
+]:
+    """Read images in batches.
+
+    The images of the next batch are decoded in the background while the current batch
+    is being detected. OpenCV releases the GIL while decoding.
+
+    Parameters
+    ----------
+    image_paths : list[pathlib.Path]
+        Paths to the images.
+
+    Yields
+    ------
+    tuple[tuple[pathlib.Path, ...], list[dtypes.ColoredImageType[np.uint8]]]
+        Paths to the images in a batch and the images.
+    """
+    batches = itertools.batched(image_paths, _BATCH_SIZE)
+    with futures.ThreadPoolExecutor(max_workers=_NUM_READ_WORKERS) as executor:
+
+        def submit(
+            batch_paths: tuple[pathlib.Path, ...] | None,
+        ) -> list[futures.Future[dtypes.ColoredImageType[np.uint8]]]:
+            if batch_paths is None:
+                return []
+            return [executor.submit(_read_image, path) for path in batch_paths]
+
+        next_paths = next(batches, None)
+        next_images = submit(next_paths)
+        while next_paths is not None:
+            batch_paths, batch_images = next_paths, next_images
+            next_paths = next(batches, None)
+            next_images = submit(next_paths)
+            yield batch_paths, [image.result() for image in batch_images]
@@ -49,12 +49,14 @@ reconstructor.reconstruct_all(loader, results_directory)
 ```
 """
 
+import collections
 import logging
+import os
 import pathlib
 import typing
+from concurrent import futures
 
 import numpy as np
-from open3d import geometry, io, utility
 from rich import progress
 
 from mcd import dtypes, log
@@ -63,11 +65,34 @@ from mcd.loader import base
 _LOGGER: typing.Final[logging.Logger] = log.setup_logger(__name__)
 """Logger for the module."""
 
+_PLY_VERTEX_DTYPE: typing.Final[np.dtype[np.void]] = np.dtype(
+    [("position", "<f4", (3,)), ("color", "u1", (3,))]
+)
+"""Layout of a vertex in the binary point cloud file."""
+
+_PLY_HEADER_TEMPLATE: typing.Final[str] = (
+    "ply\n"
+    "format binary_little_endian 1.0\n"
+    "element vertex {num_points:010d}\n"
+    "property float x\n"
+    "property float y\n"
+    "property float z\n"
+    "property uchar red\n"
+    "property uchar green\n"
+    "property uchar blue\n"
+    "end_header\n"
+)
+"""Header of the binary point cloud file.
+
+The number of points is zero-padded to a fixed width, so that the header can be
+rewritten in place once all the frames have been written.
+"""
+
 
 def unproject(
     camera_parameters: dtypes.Camera,
-    x: dtypes.NpArray1dType[np.uint32],
-    y: dtypes.NpArray1dType[np.uint32],
+    x: dtypes.NpArray1dType[np.integer[typing.Any]],
+    y: dtypes.NpArray1dType[np.integer[typing.Any]],
     depth_map: dtypes.NpArray1dType[np.float32],
     correction_matrix: dtypes.NpArray4x4Type[np.float32] | None = None,
 ) -> dtypes.NpArrayNx3Type[np.float32]:
@@ -77,9 +102,9 @@ def unproject(
     ----------
     camera_parameters : Camera
         Camera parameters.
-    x : NpArray1dType[np.uint32]
+    x : NpArray1dType[np.integer]
         X coordinate of the pixels.
-    y : NpArray1dType[np.uint32]
+    y : NpArray1dType[np.integer]
         Y coordinate of the pixels.
     depth_map : NpArray1dType[np.float32]
         Depth map.
@@ -90,32 +115,51 @@ def unproject(
     -------
     NpArrayNx3Type[np.float32]
         Unprojected points in 3D space.
+
+    Raises
+    ------
+    IndexError
+        If a pixel lies outside the depth map.
     """
-    depth_values = depth_map[y, x]  # (num_samples,)
+    height, width = depth_map.shape
+    # NOTE: The flat index below is not bounds-checked per axis, so a pixel past the
+    #       right edge would otherwise read the next row of the depth map
+    if x.size and (x.min() < 0 or x.max() >= width or y.min() < 0 or y.max() >= height):
+        message = "Pixels must lie within the depth map."
+        raise IndexError(message)
 
-    # Shape (3, num_samples) = (3, 3) @ (3, num_samples)
-    position_in_camera_space = (
-        np.linalg.inv(camera_parameters.intrinsic)
-        @ np.array([x, y, np.ones_like(x)])
-        * depth_values
-    )
+    # NOTE: `np.take()` on the flattened map gathers about twice as fast as indexing
+    #       with the pair of coordinate arrays
+    depth_values = np.take(depth_map.reshape(-1), y * width + x)
 
     if correction_matrix is None:
         correction_matrix = np.eye(4, dtype=np.float32)
 
-    # Shape (4, num_samples) = (4, 4) @ (4, num_samples)
-    corrected_position_in_camera_space = correction_matrix @ np.vstack(
-        [position_in_camera_space, np.ones_like(x)]
-    )
-    # Shape (4, num_samples) = (4, 4) @ (4, num_samples)
-    position_in_world_space = (
-        np.linalg.inv(camera_parameters.view_matrix)
-        @ corrected_position_in_camera_space
+    # The intrinsic, correction, and view transformations are composed into a single
+    # affine transformation, so that the points are transformed only once. The points
+    # in camera space are homogeneous with w = 1, so only the top rows are needed.
+    camera_to_world = camera_parameters.inverse_view_matrix @ correction_matrix
+    linear = (camera_to_world[:3, :3] @ camera_parameters.inverse_intrinsic).astype(
+        np.float32, copy=False
     )
+    translation = camera_to_world[:3, 3].astype(np.float32, copy=False)
 
-    return typing.cast(
-        "dtypes.NpArrayNx3Type[np.float32]", position_in_world_space[:3].T
-    )
+    # The scaled pixels are laid out as rows of (3, num_samples), so that each
+    # coordinate is written contiguously instead of with a stride of three elements.
+    # NOTE: The products are computed in float32, since multiplying the integer
+    #       coordinates by the depths would otherwise promote them to float64
+    scaled_pixels = np.empty((3, len(depth_values)), dtype=np.float32)
+    np.multiply(x, depth_values, out=scaled_pixels[0], dtype=np.float32)
+    np.multiply(y, depth_values, out=scaled_pixels[1], dtype=np.float32)
+    scaled_pixels[2] = depth_values
+
+    # Shape (3, num_samples) = (3, 3) @ (3, num_samples) + (3, 1)
+    position_in_world_space = linear @ scaled_pixels
+    position_in_world_space += translation[:, np.newaxis]
+
+    # NOTE: The transpose is a view, so the points are not copied into a row-major
+    #       array here. They are copied once anyway when the frames are concatenated.
+    return typing.cast("dtypes.NpArrayNx3Type[np.float32]", position_in_world_space.T)
 
 
 class Reconstructor:
@@ -130,9 +174,12 @@ class Reconstructor:
         max_confidence: int | None = None,
         max_samples: int | None = None,
         correction_matrix: dtypes.NpArray4x4Type[np.float32] | None = None,
-    ) -> tuple[dtypes.NpArrayNx3Type[np.float32], dtypes.NpArrayNx3Type[np.float32]]:
+    ) -> tuple[dtypes.NpArrayNx3Type[np.float32], dtypes.NpArrayNx3Type[np.uint8]]:
         """Reconstruct the scene from the given image and depth map.
 
+        The colors are the raw pixel values of the image, which are written to the
+        point cloud without being normalized.
+
         Parameters
         ----------
         image : ColoredImageType[np.uint8]
@@ -145,65 +192,52 @@ class Reconstructor:
             Confidence map of the depth map, by default None.
         max_confidence : int | None, default None
             Maximum confidence value, by default None. If provided, only the points with
-            the maximum confidence value are used.
+            the maximum confidence value and a positive depth are used.
         max_samples : int | None, default None
             Maximum number of samples to use, by default None.
         correction_matrix : NpArray4x4Type[np.float32] | None, default None
             Matrix to correct the position in camera space, by default None.
         """
-        y, x = np.where(depth_map > 0)
+        mask = depth_map > 0
         if confidence_map is not None and max_confidence is not None:
-            y, x = np.where(confidence_map == max_confidence)
+            # The pixels without depth are excluded even if they are confident
+            mask &= confidence_map == max_confidence
+
+        # The pixels are selected by their indices in the flattened image, which are
+        # computed at once instead of a pair of coordinate arrays
+        # NOTE: The indices fit in `np.uint32` for any realistic image size
+        indices = np.flatnonzero(mask).astype(np.uint32)
 
-        if max_samples is not None and (num_samples := len(x)) > max_samples:
+        if max_samples is not None and (num_samples := len(indices)) > max_samples:
             _random_generator = np.random.default_rng()
-            indices = _random_generator.choice(num_samples, max_samples, replace=False)
-            x, y = x[indices], y[indices]
+            indices = indices[
+                _random_generator.choice(num_samples, max_samples, replace=False)
+            ]
 
+        y, x = np.divmod(indices, np.uint32(depth_map.shape[1]))
         points = unproject(
             camera_parameters,
-            x=x.astype(np.uint32),
-            y=y.astype(np.uint32),
+            x=x,
+            y=y,
             depth_map=depth_map,
             correction_matrix=correction_matrix,
         )
-        colors = image[y, x] / 255
+        colors = np.take(image.reshape(-1, 3), indices, axis=0)
 
         return points, colors
 
-    def _create_point_cloud(
-        self,
-        points: dtypes.NpArrayNx3Type[np.float32],
-        colors: dtypes.NpArrayNx3Type[np.float32],
-    ) -> geometry.PointCloud:
-        """Create a point cloud from the points and colors.
-
-        Parameters
-        ----------
-        points : NpArrayNx3Type[np.float32]
-            Points in 3D space.
-        colors : NpArrayNx3Type[np.float32]
-            Colors of the points.
-
-        Returns
-        -------
-        PointCloud
-            Point cloud.
-        """
-        point_cloud = geometry.PointCloud()
-        point_cloud.points = utility.Vector3dVector(points)
-        point_cloud.colors = utility.Vector3dVector(colors)
-
-        return point_cloud
-
     def reconstruct_all(
         self,
         loader: base.ImageLoaderBase,
         results_directory: pathlib.Path,
         max_samples_per_frame: int | None = None,
+        max_workers: int | None = None,
     ) -> None:
         """Reconstruct the scene from all the images in the loader.
 
+        The points are saved as a binary PLY file, `point_cloud.ply`, in the results
+        directory.
+
         Parameters
         ----------
         loader : ImageLoaderBase
@@ -212,26 +246,98 @@ class Reconstructor:
             Directory to save the results.
         max_samples_per_frame : int | None, default None
             Maximum number of samples to use per frame, by default None.
+        max_workers : int | None, default None
+            Maximum number of threads to reconstruct frames in parallel. If None, the
+            number of processors on the machine is used.
         """
-        points: dtypes.NpArrayNx3Type[np.float32] = np.empty((0, 3), dtype=np.float32)
-        colors: dtypes.NpArrayNx3Type[np.float32] = np.empty((0, 3), dtype=np.float32)
-        with progress.Progress() as progress_bar:
+        # The points of each frame are written as soon as they are collected, so the
+        # whole point cloud is never held in memory. They go to a temporary sibling
+        # first, so a failure never leaves a truncated point cloud behind.
+        save_path = results_directory / "point_cloud.ply"
+        temporary_path = save_path.with_name(f"{save_path.name}.tmp")
+        try:
+            self._write_point_cloud(
+                loader,
+                temporary_path,
+                max_samples_per_frame=max_samples_per_frame,
+                num_workers=max_workers or os.cpu_count() or 1,
+            )
+        except BaseException:
+            temporary_path.unlink(missing_ok=True)
+            raise
+        temporary_path.replace(save_path)
+
+        _LOGGER.info("Point cloud saved at: %s", save_path)
+
+    def _write_point_cloud(
+        self,
+        loader: base.ImageLoaderBase,
+        save_path: pathlib.Path,
+        max_samples_per_frame: int | None,
+        num_workers: int,
+    ) -> None:
+        """Reconstruct all the frames and write their points to a binary PLY file.
+
+        Parameters
+        ----------
+        loader : ImageLoaderBase
+            Data loader for the images.
+        save_path : Path
+            Path to save the point cloud.
+        max_samples_per_frame : int | None
+            Maximum number of samples to use per frame.
+        num_workers : int
+            Number of threads to reconstruct frames in parallel.
+        """
+        # NOTE: Threads are enough here, since NumPy releases the GIL for the heavy
+        #       array operations. Only a limited number of frames are in flight at a
+        #       time to bound the memory held by the decoded images and depth maps, and
+        #       the results are collected in submission order to keep the output stable.
+        pending_frames: collections.deque[
+            tuple[
+                dtypes.ImageId,
+                futures.Future[
+                    tuple[
+                        dtypes.NpArrayNx3Type[np.float32],
+                        dtypes.NpArrayNx3Type[np.uint8],
+                    ]
+                ],
+            ]
+        ] = collections.deque()
+        num_frames = 0
+        num_points = 0
+
+        with (
+            save_path.open("wb") as file,
+            progress.Progress() as progress_bar,
+            futures.ThreadPoolExecutor(max_workers=num_workers) as executor,
+        ):
+            file.write(_PLY_HEADER_TEMPLATE.format(num_points=0).encode("ascii"))
             task = progress_bar.add_task("[cyan]Reconstructing", total=len(loader))
 
-            for i, (
-                image_id,
-                image,
-                depth_map,
-                confidence_map,
-                camera_parameters,
-            ) in enumerate(loader):
+            def collect_oldest_frame() -> None:
+                nonlocal num_frames, num_points
+
+                image_id, future = pending_frames.popleft()
+                frame_points, frame_colors = future.result()
+
+                vertices = np.empty(len(frame_points), dtype=_PLY_VERTEX_DTYPE)
+                vertices["position"] = frame_points
+                vertices["color"] = frame_colors
+                file.write(vertices.tobytes())
+
+                num_frames += 1
+                num_points += len(vertices)
                 progress_bar.update(
                     task,
                     advance=1,
                     description=f"[green]Reconstructing {image_id} "
-                    f"{i + 1}/{len(loader)}",
+                    f"{num_frames}/{len(loader)}",
                 )
-                frame_points, frame_colors = self.reconstruct(
+
+            for image_id, image, depth_map, confidence_map, camera_parameters in loader:
+                future = executor.submit(
+                    self.reconstruct,
                     image=image,
                     depth_map=depth_map,
                     camera_parameters=camera_parameters,
@@ -239,17 +345,15 @@ class Reconstructor:
                     max_samples=max_samples_per_frame,
                     correction_matrix=loader.correction_matrix,
                 )
+                pending_frames.append((image_id, future))
 
-                points = np.vstack([points, frame_points])
-                colors = np.vstack([colors, frame_colors])
+                if len(pending_frames) >= 2 * num_workers:
+                    collect_oldest_frame()
 
-        point_cloud = self._create_point_cloud(points, colors)
-        save_path = results_directory / "point_cloud.ply"
-        io.write_point_cloud(
-            save_path.as_posix(),
-            point_cloud,
-            write_ascii=False,
-            compressed=True,
-            print_progress=True,
-        )
-        _LOGGER.info("Point cloud saved at: %s", save_path)
+            while pending_frames:
+                collect_oldest_frame()
+
+            file.seek(0)
+            file.write(
+                _PLY_HEADER_TEMPLATE.format(num_points=num_points).encode("ascii")
+            )
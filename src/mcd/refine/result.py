@@ -1,5 +1,6 @@
 """Result schema for refined change detection."""
 
+import itertools
 import typing
 
 import numpy as np
@@ -12,6 +13,9 @@ from mcd.change_detection import result
 type ClusterId = int
 """Cluster identifier type."""
 
+_NUM_COLUMNS: typing.Final[int] = 8
+"""Number of columns of the coordinates with metadata of clustered points."""
+
 
 class ClusteredPoint(pydantic.BaseModel, frozen=True, strict=True):
     """Point data type with change information.
@@ -169,15 +173,21 @@ class PointsInCluster(
         tuple[dtypes.Point, dtypes.Pixel, result.Change, dtypes.ImageId]
             Point in 3D space, pixel, change type, and image ID.
         """
-        for point, pixel, change, image_index in zip(
-            self.points, self.pixels, self.changes, self.image_indices, strict=True
+        # NOTE: The arrays are converted to Python objects at once, instead of
+        #       creating a NumPy scalar for every element. The integer arrays may be
+        #       stored as floats, when they are split from a single array.
+        for (x, y, z), (pixel_x, pixel_y), change, image_index in zip(
+            self.points.tolist(),
+            self.pixels.astype(np.int64, copy=False).tolist(),
+            self.changes.ravel().astype(np.int64, copy=False).tolist(),
+            self.image_indices.ravel().astype(np.int64, copy=False).tolist(),
+            strict=True,
         ):
-            image_id = self._index_to_image_id[int(image_index.squeeze())]
             yield (
-                dtypes.Point(x=point[0], y=point[1], z=point[2]),
-                dtypes.Pixel(x=int(pixel[0]), y=int(pixel[1])),
-                result.Change(change.squeeze()),
-                image_id,
+                dtypes.Point(x=x, y=y, z=z),
+                dtypes.Pixel(x=pixel_x, y=pixel_y),
+                result.Change(change),
+                self._index_to_image_id[image_index],
             )
 
 
@@ -204,9 +214,12 @@ class ClusteredPoints(
         }
         """Mapping from image ID to index in the list of clustered points."""
 
-        coordinates_with_metadata = np.array(
-            [
-                [
+        # The values are written into a float32 array directly, instead of building a
+        # list for every point first
+        num_points = len(data["root"])
+        coordinates_with_metadata = np.fromiter(
+            itertools.chain.from_iterable(
+                (
                     point.point.x,
                     point.point.y,
                     point.point.z,
@@ -215,12 +228,16 @@ class ClusteredPoints(
                     point.change.value,
                     self._image_id_to_index[point.image_id],
                     point.cluster_id,
-                ]
+                )
                 for point in data["root"]
-            ]
-        )
-        self._coordinates_with_metadata: typing.Final[npt.NDArray[np.generic]] = (
-            coordinates_with_metadata
+            ),
+            dtype=np.float32,
+            count=num_points * _NUM_COLUMNS,
+        ).reshape(num_points, _NUM_COLUMNS)
+        # NOTE: The stable sort keeps the order of the points within each cluster
+        order = np.argsort(coordinates_with_metadata[:, -1], kind="stable")
+        self._coordinates_with_metadata: typing.Final[npt.NDArray[np.float32]] = (
+            coordinates_with_metadata[order]
         )
         """NumPy representation of the coordinates with metadata.
 
@@ -230,8 +247,27 @@ class ClusteredPoints(
         - (1) Change type.
         - (1) Image ID.
         - (1) Cluster ID.
+
+        The rows are sorted by the cluster ID, so that the points in a cluster are
+        contiguous.
         """
 
+        cluster_ids, starts, counts = np.unique(
+            self._coordinates_with_metadata[:, -1],
+            return_index=True,
+            return_counts=True,
+        )
+        self._cluster_id_to_slice: typing.Final[dict[ClusterId, slice]] = {
+            cluster_id: slice(start, start + count)
+            for cluster_id, start, count in zip(
+                cluster_ids.astype(np.int64).tolist(),
+                starts.tolist(),
+                counts.tolist(),
+                strict=True,
+            )
+        }
+        """Mapping from cluster ID to the rows of the points in the cluster."""
+
     @pydantic.model_serializer
     def _serialize_model(self) -> list[ClusteredPoint]:
         """Serialize the model to a list of ClusteredPoint."""
@@ -246,10 +282,7 @@ class ClusteredPoints(
         list[ClusterId]
             Unique cluster identifiers.
         """
-        return [
-            int(cluster_id)
-            for cluster_id in np.unique(self._coordinates_with_metadata[:, -1])
-        ]
+        return list(self._cluster_id_to_slice)
 
     def get_points_in_cluster(self, cluster_id: ClusterId) -> PointsInCluster:
         """Get the points in a cluster.
@@ -265,7 +298,7 @@ class ClusteredPoints(
             Points information in the cluster.
         """
         coordinates_with_metadata = self._coordinates_with_metadata[
-            self._coordinates_with_metadata[:, -1] == cluster_id
+            self._cluster_id_to_slice.get(cluster_id, slice(0))
         ]
         points, pixels, changes, image_ids, _ = np.split(
             coordinates_with_metadata, [3, 5, 6, 7], axis=1
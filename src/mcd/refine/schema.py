@@ -45,13 +45,16 @@ class ChangePoints(
     root: list[ChangePoint]
     """List of change points."""
 
-    coordinates: dtypes.NpArrayNx3Type[np.float32] = pydantic.Field(init=False)
+    coordinates: dtypes.NpArrayNx3Type[np.float64] = pydantic.Field(init=False)
     """NumPy representation of the coordinates."""
 
     def __init__(self, /, **data: list[ChangePoint]) -> None:
+        # NOTE: The coordinates are kept in float64, since scikit-learn would copy a
+        #       float32 array to float64 anyway to build its neighbor trees
         coordinates = np.array(
-            [[point.point.x, point.point.y, point.point.z] for point in data["root"]]
-        )
+            [(point.point.x, point.point.y, point.point.z) for point in data["root"]],
+            dtype=np.float64,
+        ).reshape(-1, 3)
         super().__init__(**data, coordinates=coordinates)
 
     @pydantic.model_serializer
@@ -115,6 +118,32 @@ class LabelInfo3d(pydantic.BaseModel, frozen=True, strict=True):
         raise ValueError(message)
 
 
+def _get_sort_key(
+    label_info_3d: LabelInfo3d,
+) -> tuple[str, int, int, int, float, float, float]:
+    """Get the key to sort the 3D labels by.
+
+    Parameters
+    ----------
+    label_info_3d : LabelInfo3d
+        3D label.
+
+    Returns
+    -------
+    tuple[str, int, int, int, float, float, float]
+        Label name, label ID, pixel and point of the label.
+    """
+    return (
+        label_info_3d.label_name or "",
+        -1 if label_info_3d.label_id is None else label_info_3d.label_id,
+        label_info_3d.pixel.x,
+        label_info_3d.pixel.y,
+        label_info_3d.point.x,
+        label_info_3d.point.y,
+        label_info_3d.point.z,
+    )
+
+
 class SinglePairResult3d(pydantic.BaseModel, frozen=True):
     """Result schema for change detection in 3D space of a single pair of images.
 
@@ -142,11 +171,16 @@ class SinglePairResult3d(pydantic.BaseModel, frozen=True):
 
     @pydantic.model_serializer
     def _serialize_model(self) -> dict[str, list[LabelInfo3d]]:
-        """Serialize the model to a dictionary."""
+        """Serialize the model to a dictionary.
+
+        The labels are sorted, since the iteration order of a set depends on the hashes
+        of the labels and on how the set was built, e.g. by unpickling the results of a
+        worker process.
+        """
         return {
-            "added": list(self.added),
-            "removed": list(self.removed),
-            "unchanged": list(self.unchanged),
+            "added": sorted(self.added, key=_get_sort_key),
+            "removed": sorted(self.removed, key=_get_sort_key),
+            "unchanged": sorted(self.unchanged, key=_get_sort_key),
         }
 
 
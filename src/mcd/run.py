@@ -190,7 +190,8 @@ def _execute_change_detection_pipeline(
     match object_detection_config.object_detector_id:
         case "yolo":
             object_detector = yolo.YoloObjectDetector(
-                object_detection_config.model_path
+                object_detection_config.model_path,
+                half_precision=object_detection_config.half_precision,
             )
         case _ as unreachable:
             typing.assert_never(unreachable)
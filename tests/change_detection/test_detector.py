@@ -4,10 +4,14 @@ import json
 import pathlib
 import tempfile
 import typing
+from unittest import mock
 
+import numpy as np
 import pytest
+from numpy import testing
+from PIL import Image
 
-from mcd.change_detection import detector, label, result
+from mcd.change_detection import detector, exceptions, label, result
 from mcd.loader import yolo
 
 _TEST_DATA_DIRECTORY: typing.Final[pathlib.Path] = (
@@ -53,6 +57,26 @@ class TestChangeDetectorBase:
             },
         )
 
+    def test_run_reads_each_label_file_once(self) -> None:
+        """Test that the `run()` method reads each label file only once."""
+        datasets_path = _TEST_DATA_DIRECTORY / "datasets"
+        before_label_path = (
+            datasets_path / "before" / "image_0" / "labels" / "image_0.txt"
+        )
+        after_label_path = (
+            datasets_path / "after" / "image_0" / "labels" / "image_0.txt"
+        )
+        loader = yolo.YoloObjectDetectionDataLoader()
+        with mock.patch.object(
+            loader, "read_labels", wraps=loader.read_labels
+        ) as read_labels:
+            detector.ChangeDetector().run(before_label_path, after_label_path, loader)
+
+        assert read_labels.call_args_list == [
+            mock.call(before_label_path),
+            mock.call(after_label_path),
+        ]
+
     class TestRunAll:
         """Test suite for the `run_all()` method."""
 
@@ -66,6 +90,38 @@ class TestChangeDetectorBase:
                     loader=yolo.YoloObjectDetectionDataLoader(),
                 )
 
+        @pytest.mark.parametrize(
+            "min_pairs_for_processes", [0, detector._MIN_PAIRS_FOR_PROCESSES]
+        )
+        def test_run_all_label_inconsistent_error(
+            self, min_pairs_for_processes: int
+        ) -> None:
+            """Test that inconsistent labels are raised from the worker processes."""
+            with tempfile.TemporaryDirectory() as directory_str:
+                datasets_path = pathlib.Path(directory_str)
+                for dataset_name, class_label in (("before", "0"), ("after", "chair")):
+                    for image_id in ("image_0", "image_1"):
+                        labels_path = datasets_path / dataset_name / image_id / "labels"
+                        labels_path.mkdir(parents=True)
+                        (labels_path / f"{image_id}.txt").write_text(
+                            f"{class_label} 0.5 0.5 0.2 0.2\n"
+                        )
+                Image.new("RGB", (4, 4)).save(
+                    datasets_path / "before" / "image_0" / "image_0.jpg"
+                )
+
+                with (
+                    mock.patch.object(
+                        detector, "_MIN_PAIRS_FOR_PROCESSES", min_pairs_for_processes
+                    ),
+                    pytest.raises(exceptions.LabelInconsistentError),
+                ):
+                    detector.ChangeDetector().run_all(
+                        datasets_path,
+                        loader=yolo.YoloObjectDetectionDataLoader(),
+                        max_workers=2,
+                    )
+
         def test_run_all(self) -> None:
             """Test the `run_all()` method for a successful run."""
             change_detector = detector.ChangeDetector()
@@ -141,18 +197,160 @@ class TestChangeDetectorBase:
             ),
         ],
     )
-    def test_check_intersection(
+    def test_compare_bounding_boxes_single_pair(
         self, description: str, label2: label.LabelInfo, *, expected: bool
     ) -> None:
-        """Test the `check_intersection()` method."""
+        """Test the `compare_bounding_boxes()` method for a single pair of labels."""
         change_detector = detector.ChangeDetector()
         label1 = label.LabelInfo(
             label_id=0,
             bounding_box=label.BoundingBox(x=0.5, y=0.5, width=1.0, height=0.5),
         )
-        assert change_detector._check_intersection(label1, label2) == expected, (
-            description
+        actual_result = change_detector._compare_bounding_boxes([label1], [label2])
+
+        expected_result = (
+            result.SinglePairResult(added=set(), removed=set(), unchanged={label1})
+            if expected
+            else result.SinglePairResult(
+                added={label2}, removed={label1}, unchanged=set()
+            )
+        )
+        assert actual_result == expected_result, description
+
+    def test_packed_labels(self) -> None:
+        """Test packing labels with `_PackedLabels.from_labels()`."""
+        bounding_box = label.BoundingBox(x=0.5, y=0.5, width=1.0, height=0.5)
+        packed_labels = detector._PackedLabels.from_labels(
+            [
+                label.LabelInfo(label_id=0, bounding_box=bounding_box),
+                label.LabelInfo(label_name="label", bounding_box=bounding_box),
+            ]
+        )
+
+        assert packed_labels.bounding_boxes.dtype == np.float32
+        testing.assert_array_equal(
+            packed_labels.bounding_boxes, np.array([bounding_box.xyxy] * 2)
+        )
+        assert packed_labels.label_ids.tolist() == [0, None]
+        assert packed_labels.label_names.tolist() == [None, "label"]
+
+    def test_compute_intersection_matrix(self) -> None:
+        """Test the `compute_intersection_matrix()` method."""
+        bounding_box = label.BoundingBox(x=0.5, y=0.5, width=1.0, height=0.5)
+        others = [
+            label.BoundingBox(x=0.5, y=0.5, width=1.0, height=0.5),
+            label.BoundingBox(x=0.25, y=0.25, width=0.5, height=0.5),
+            label.BoundingBox(x=0.125, y=0.125, width=0.125, height=0.125),
+        ]
+        intersection_matrix = detector.ChangeDetector()._compute_intersection_matrix(
+            np.array([bounding_box.xyxy], dtype=np.float32),
+            np.array([other.xyxy for other in others], dtype=np.float32),
+        )
+        testing.assert_array_equal(
+            intersection_matrix,
+            np.array([[bounding_box.compute_iou(other) > 0 for other in others]]),
+        )
+
+    def test_compute_intersection_matrix_empty(self) -> None:
+        """Test the `compute_intersection_matrix()` method with no labels after."""
+        bounding_box = label.BoundingBox(x=0.5, y=0.5, width=1.0, height=0.5)
+        intersection_matrix = detector.ChangeDetector()._compute_intersection_matrix(
+            np.array([bounding_box.xyxy], dtype=np.float32),
+            np.empty((0, 4), dtype=np.float32),
+        )
+        assert intersection_matrix.shape == (1, 0)
+
+    def test_find_intersections(self) -> None:
+        """Test that `_find_intersections()` agrees with the intersection matrix."""
+        rng = np.random.default_rng(0)
+        centers = rng.uniform(0.2, 0.8, size=(2, 10, 2))
+        sizes = rng.uniform(0.05, 0.3, size=(2, 10, 2))
+        before_bounding_boxes, after_bounding_boxes = np.concatenate(
+            [centers - sizes / 2, centers + sizes / 2], axis=-1, dtype=np.float32
+        )
+
+        intersections = detector.ChangeDetector()._find_intersections(
+            before_bounding_boxes.tolist(),
+            after_bounding_boxes.tolist(),
+            list(range(10)),
+            list(range(10)),
+        )
+
+        intersection_matrix = detector.ChangeDetector()._compute_intersection_matrix(
+            before_bounding_boxes, after_bounding_boxes
+        )
+        assert list(intersections) == [
+            tuple(index) for index in np.argwhere(intersection_matrix).tolist()
+        ]
+
+    class TestCheckLabelConsistency:
+        """Test suite for the `_check_label_consistency()` method."""
+
+        @pytest.fixture
+        def bounding_box(self) -> label.BoundingBox:
+            """Create a bounding box."""
+            return label.BoundingBox(x=0.5, y=0.5, width=1.0, height=0.5)
+
+        def test_check_label_consistency(self, bounding_box: label.BoundingBox) -> None:
+            """Test the `_check_label_consistency()` method for valid input."""
+            before_labels = [
+                label.LabelInfo(label_id=0, bounding_box=bounding_box),
+                label.LabelInfo(label_name="label", bounding_box=bounding_box),
+            ]
+            after_labels = [
+                label.LabelInfo(
+                    label_id=0, label_name="label", bounding_box=bounding_box
+                )
+            ]
+            try:
+                detector.ChangeDetector()._check_label_consistency(
+                    detector._PackedLabels.from_labels(before_labels),
+                    detector._PackedLabels.from_labels(after_labels),
+                )
+            except exceptions.LabelInconsistentError:
+                pytest.fail("LabelInconsistentError raised unexpectedly.")
+
+        @pytest.mark.parametrize(
+            ("before_label_id", "before_label_name", "after_label_id"),
+            [(1, None, None), (None, "label", 1)],
+        )
+        def test_check_label_consistency_inconsistent(
+            self,
+            bounding_box: label.BoundingBox,
+            before_label_id: label.LabelId | None,
+            before_label_name: label.LabelName | None,
+            after_label_id: label.LabelId | None,
+        ) -> None:
+            """Test the `_check_label_consistency()` method for invalid input."""
+            before_labels = [
+                label.LabelInfo(
+                    label_id=before_label_id,
+                    label_name=before_label_name,
+                    bounding_box=bounding_box,
+                )
+            ]
+            after_labels = [
+                label.LabelInfo(
+                    label_id=after_label_id,
+                    label_name=None if after_label_id is not None else "label",
+                    bounding_box=bounding_box,
+                )
+            ]
+            with pytest.raises(exceptions.LabelInconsistentError):
+                detector.ChangeDetector()._check_label_consistency(
+                    detector._PackedLabels.from_labels(before_labels),
+                    detector._PackedLabels.from_labels(after_labels),
+                )
+
+    def test_group_by_label(self) -> None:
+        """Test the `_group_by_label()` method."""
+        label_to_indices = detector.ChangeDetector()._group_by_label(
+            [0, "label", None, 0, "label", 1]
         )
+        assert label_to_indices.keys() == {0, 1, "label"}
+        testing.assert_array_equal(label_to_indices[0], np.array([0, 3]))
+        testing.assert_array_equal(label_to_indices[1], np.array([5]))
+        testing.assert_array_equal(label_to_indices["label"], np.array([1, 4]))
 
     def test_compare_bounding_boxes(self) -> None:
         """Test the `compare_bounding_boxes()` method."""
@@ -192,6 +390,115 @@ class TestChangeDetectorBase:
         )
         assert actual_result == expected_result
 
+    def test_compare_bounding_boxes_multiple_intersections(self) -> None:
+        """Test the `compare_bounding_boxes()` method with multiple intersections.
+
+        A bounding box before the change may intersect with multiple bounding boxes
+        after the change, in which case none of them are considered added.
+        """
+        before_labels = [
+            label.LabelInfo(
+                label_id=0,
+                bounding_box=label.BoundingBox(x=0.5, y=0.5, width=0.4, height=0.4),
+            )
+        ]
+        after_labels = [
+            label.LabelInfo(
+                label_id=0,
+                bounding_box=label.BoundingBox(x=0.4, y=0.4, width=0.1, height=0.1),
+            ),
+            label.LabelInfo(
+                label_id=0,
+                bounding_box=label.BoundingBox(x=0.6, y=0.6, width=0.1, height=0.1),
+            ),
+        ]
+
+        actual_result = detector.ChangeDetector()._compare_bounding_boxes(
+            before_labels, after_labels
+        )
+
+        expected_result = result.SinglePairResult(
+            added=set(), removed=set(), unchanged={before_labels[0]}
+        )
+        assert actual_result == expected_result
+
+    def test_compare_bounding_boxes_large_label_group(self) -> None:
+        """Test the `compare_bounding_boxes()` method with many boxes of a label."""
+        before_labels = [
+            label.LabelInfo(
+                label_id=0,
+                bounding_box=label.BoundingBox(
+                    x=0.05 + 0.1 * i, y=0.5, width=0.05, height=0.05
+                ),
+            )
+            for i in range(10)
+        ]
+        after_labels = [
+            label.LabelInfo(
+                label_id=0,
+                bounding_box=label.BoundingBox(
+                    x=0.05 + 0.1 * i, y=0.5 + 0.02 * (i % 2), width=0.05, height=0.05
+                ),
+            )
+            for i in range(10)
+        ]
+        after_labels[-1] = label.LabelInfo(
+            label_id=0,
+            bounding_box=label.BoundingBox(x=0.5, y=0.1, width=0.05, height=0.05),
+        )
+
+        actual_result = detector.ChangeDetector()._compare_bounding_boxes(
+            before_labels, after_labels
+        )
+
+        expected_result = result.SinglePairResult(
+            added={after_labels[-1]},
+            removed={before_labels[-1]},
+            unchanged=set(before_labels[:-1]),
+        )
+        assert actual_result == expected_result
+
+    def test_compare_bounding_boxes_no_common_labels(self) -> None:
+        """Test the `compare_bounding_boxes()` method without common labels."""
+        bounding_box = label.BoundingBox(x=0.5, y=0.5, width=0.4, height=0.4)
+        before_labels = [label.LabelInfo(label_id=0, bounding_box=bounding_box)]
+        after_labels = [
+            label.LabelInfo(label_id=1, bounding_box=bounding_box),
+            label.LabelInfo(label_id=2, bounding_box=bounding_box),
+        ]
+
+        actual_result = detector.ChangeDetector()._compare_bounding_boxes(
+            before_labels, after_labels
+        )
+
+        expected_result = result.SinglePairResult(
+            added=set(after_labels), removed=set(before_labels), unchanged=set()
+        )
+        assert actual_result == expected_result
+
+    def test_compare_bounding_boxes_label_names(self) -> None:
+        """Test the `compare_bounding_boxes()` method with label names."""
+        bounding_box = label.BoundingBox(x=0.5, y=0.5, width=0.4, height=0.4)
+        before_labels = [
+            label.LabelInfo(label_name="chair", bounding_box=bounding_box),
+            label.LabelInfo(label_name="desk", bounding_box=bounding_box),
+        ]
+        after_labels = [
+            label.LabelInfo(label_id=0, label_name="chair", bounding_box=bounding_box),
+            label.LabelInfo(label_id=1, label_name="sofa", bounding_box=bounding_box),
+        ]
+
+        actual_result = detector.ChangeDetector()._compare_bounding_boxes(
+            before_labels, after_labels
+        )
+
+        expected_result = result.SinglePairResult(
+            added={after_labels[1]},
+            removed={before_labels[1]},
+            unchanged={before_labels[0]},
+        )
+        assert actual_result == expected_result
+
     def test_export_result(self) -> None:
         """Test the `export_result()` method."""
         bounding_box = label.BoundingBox(x=0.0, y=0.0, width=1.0, height=1.0)
@@ -1,5 +1,7 @@
 """Unit tests for the `exceptions` module."""
 
+import pickle
+
 import pytest
 
 from mcd.change_detection import exceptions
@@ -19,6 +21,15 @@ class TestLabelInconsistentError:
             "provided for one label, it must be provided for the other label as well."
         )
 
+    def test_pickle(self) -> None:
+        """Test that the exception is restored from a pickle, as from a worker."""
+        error = exceptions.LabelInconsistentError(
+            label_type="label_name", label1="chair", label2=None
+        )
+        restored_error = pickle.loads(pickle.dumps(error))  # noqa: S301
+        assert isinstance(restored_error, exceptions.LabelInconsistentError)
+        assert str(restored_error) == str(error)
+
 
 class TestTooManyDatasetsError:
     """Test suite for the `TooManyDatasetsError` class."""
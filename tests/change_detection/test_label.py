@@ -1,5 +1,7 @@
 """Unit tests for the `label` module."""
 
+import warnings
+
 import pytest
 
 from mcd.change_detection import exceptions, label
@@ -50,6 +52,15 @@ class TestBoundingBox:
                     == f"Bounding box {target} is greater than 1 ({value})."
                 )
 
+        def test_xyxy_warning_only_at_construction(self) -> None:
+            """Test that the bound check does not run when accessing `xyxy`."""
+            with pytest.warns(UserWarning, match="greater than 1"):
+                bounding_box = label.BoundingBox(x=1, y=1, width=1, height=1)
+
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                assert bounding_box.xyxy == (0.5, 0.5, 1.5, 1.5)
+
     @pytest.mark.parametrize(
         ("other", "expected"),
         [
@@ -127,6 +138,16 @@ class TestLabelInfo:
             label2 = label.LabelInfo(label_name=label2_name, bounding_box=bounding_box)
             assert label1.is_label_same(label2) == expected
 
+        def test_is_label_same_for_label_name_with_label_id(
+            self, bounding_box: label.BoundingBox
+        ) -> None:
+            """Test the `is_label_same()` method when only `label_name` is shared."""
+            label1 = label.LabelInfo(label_name="label", bounding_box=bounding_box)
+            label2 = label.LabelInfo(
+                label_id=1, label_name="label", bounding_box=bounding_box
+            )
+            assert label1.is_label_same(label2)
+
         def test_is_label_same_for_invalid_label_id(
             self, bounding_box: label.BoundingBox
         ) -> None:
@@ -0,0 +1,29 @@
+"""Test module for the `_camera` module."""
+
+import numpy as np
+from numpy import testing
+
+from mcd.dtypes import _camera
+
+
+class TestCamera:
+    """Test suite for the `Camera` class."""
+
+    def test_inverse_matrices(self) -> None:
+        """Test that the inverse matrices are computed once and cached."""
+        intrinsic = np.array(
+            [[500.0, 0.0, 320.0], [0.0, 400.0, 240.0], [0.0, 0.0, 1.0]],
+            dtype=np.float32,
+        )
+        view_matrix = np.eye(4, dtype=np.float32)
+        view_matrix[:3, 3] = [1.0, 2.0, 3.0]
+        camera = _camera.Camera(intrinsic=intrinsic, view_matrix=view_matrix)
+
+        testing.assert_allclose(
+            camera.inverse_intrinsic @ intrinsic, np.eye(3), atol=1e-6
+        )
+        testing.assert_allclose(
+            camera.inverse_view_matrix @ view_matrix, np.eye(4), atol=1e-6
+        )
+        assert camera.inverse_intrinsic is camera.inverse_intrinsic
+        assert camera.inverse_view_matrix is camera.inverse_view_matrix
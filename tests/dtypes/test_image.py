@@ -1,6 +1,7 @@
 """Test module for the `_image` module."""
 
 import numpy as np
+import pydantic
 import pytest
 from numpy._typing import _shape
 
@@ -50,3 +51,13 @@ class TestValidateColoredImage:
             ValueError, match="Input image must be a 3D array with 3 channels."
         ):
             _image._validate_colored_image(image)
+
+
+class TestPixel:
+    """Test suite for the `Pixel` class."""
+
+    @pytest.mark.parametrize(("x", "y"), [(-5, 0), (0, -1), (1.5, 2)])
+    def test_invalid_coordinates(self, x: float, y: float) -> None:
+        """Test that negative or non-integer coordinates are rejected."""
+        with pytest.raises(pydantic.ValidationError):
+            _image.Pixel(x=x, y=y)
@@ -0,0 +1,16 @@
+"""Test module for the `_space` module."""
+
+import pydantic
+import pytest
+
+from mcd.dtypes import _space
+
+
+class TestPoint:
+    """Test suite for the `Point` class."""
+
+    @pytest.mark.parametrize(("x", "y", "z"), [("0.5", 1.0, 1.5), (0.5, None, 1.5)])
+    def test_non_numeric(self, x: object, y: object, z: object) -> None:
+        """Test that non-numeric coordinates are rejected."""
+        with pytest.raises(pydantic.ValidationError):
+            _space.Point(x=x, y=y, z=z)
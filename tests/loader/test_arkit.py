@@ -0,0 +1,246 @@
+"""Unit tests for the `arkit` module."""
+
+import json
+import os
+import pathlib
+import tempfile
+import typing
+
+import cv2
+import numpy as np
+import pydantic
+import pytest
+from numpy import testing
+
+from mcd.loader import arkit
+
+_NUM_FRAMES: typing.Final[int] = 12
+"""Number of frames in the test dataset.
+
+It is larger than the number of frames loaded ahead, and the two-digit frame numbers
+check the natural sorting.
+"""
+
+
+def _create_frame(frame_number: int) -> dict[str, typing.Any]:
+    """Create the JSON data of a frame whose depth is the frame number."""
+    return {
+        "intrinsic": np.eye(3).tolist(),
+        "view_matrix": np.eye(4).tolist(),
+        "resolution": [4, 2],
+        "timestamp": float(frame_number),
+        "frame_number": frame_number,
+        "depth_map": {
+            "height": 1,
+            "width": 2,
+            "values": [float(frame_number), float(frame_number)],
+        },
+        "confidence_map": {"height": 1, "width": 2, "values": [0, 2]},
+    }
+
+
+class TestArkitDepthMap:
+    """Test suite for the `_ArkitDepthMap` class."""
+
+    def test_values(self) -> None:
+        """Test that the values are converted to a NumPy array."""
+        depth_map = arkit._ArkitDepthMap.model_validate(
+            {"height": 2, "width": 3, "values": [0.0, 0.5, 1.0, 1.5, 2.0, 2.5]}
+        )
+        assert depth_map.values.dtype == np.float32
+        testing.assert_array_equal(
+            depth_map.values, np.array([0.0, 0.5, 1.0, 1.5, 2.0, 2.5])
+        )
+
+    def test_values_array(self) -> None:
+        """Test that a float32 array is used without copying or validating it again."""
+        values = np.array([0.0, 0.5, 1.0, 1.5, 2.0, 2.5], dtype=np.float32)
+        depth_map = arkit._ArkitDepthMap(height=2, width=3, values=values)
+        assert depth_map.values is values
+
+    def test_values_negative(self) -> None:
+        """Test that negative values are rejected."""
+        with pytest.raises(pydantic.ValidationError, match="non-negative"):
+            arkit._ArkitDepthMap.model_validate(
+                {"height": 1, "width": 2, "values": [1.0, -1.0]}
+            )
+
+    @pytest.mark.parametrize("value", ["1.5", True, None])
+    def test_values_not_number(self, value: object) -> None:
+        """Test that values other than numbers are rejected."""
+        with pytest.raises(pydantic.ValidationError, match="must be numbers"):
+            arkit._ArkitDepthMap.model_validate(
+                {"height": 1, "width": 2, "values": [1.0, value]}
+            )
+
+    def test_values_nan(self) -> None:
+        """Test that NaN values are rejected."""
+        with pytest.raises(pydantic.ValidationError, match="non-negative"):
+            arkit._ArkitDepthMap.model_validate(
+                {"height": 1, "width": 2, "values": [1.0, float("nan")]}
+            )
+
+    def test_to_numpy(self) -> None:
+        """Test the `to_numpy()` method."""
+        depth_map = arkit._ArkitDepthMap.model_validate(
+            {"height": 2, "width": 3, "values": [0.0, 0.5, 1.0, 1.5, 2.0, 2.5]}
+        )
+        testing.assert_array_equal(
+            depth_map.to_numpy(), np.array([[1.5, 0.0], [2.0, 0.5], [2.5, 1.0]])
+        )
+
+
+class TestArkitConfidenceMap:
+    """Test suite for the `_ArkitConfidenceMap` class."""
+
+    def test_values(self) -> None:
+        """Test that the values are converted to a NumPy array."""
+        confidence_map = arkit._ArkitConfidenceMap.model_validate(
+            {"height": 1, "width": 3, "values": [0, 1, 2]}
+        )
+        assert confidence_map.values.dtype == np.uint8
+        testing.assert_array_equal(confidence_map.values, np.array([0, 1, 2]))
+
+    @pytest.mark.parametrize("value", [1.0, True, "1"])
+    def test_values_not_integer(self, value: object) -> None:
+        """Test that values other than integers are rejected."""
+        with pytest.raises(pydantic.ValidationError, match="must be integers"):
+            arkit._ArkitConfidenceMap.model_validate(
+                {"height": 1, "width": 2, "values": [1, value]}
+            )
+
+    def test_values_out_of_range(self) -> None:
+        """Test that values other than 0, 1, or 2 are rejected."""
+        with pytest.raises(pydantic.ValidationError, match="0, 1, or 2"):
+            arkit._ArkitConfidenceMap.model_validate(
+                {"height": 1, "width": 2, "values": [1, 3]}
+            )
+
+
+def test_frame_matrices() -> None:
+    """Test that the column-major matrices are transposed into C-contiguous arrays."""
+    data = _create_frame(0)
+    data["view_matrix"] = np.arange(16).reshape(4, 4).tolist()
+    data["intrinsic"] = np.arange(9).reshape(3, 3).tolist()
+    frame = arkit.ArkitFrame.model_validate(data)
+
+    for matrix, size in ((frame.view_matrix, 4), (frame.intrinsic, 3)):
+        assert matrix.dtype == np.float32
+        assert matrix.flags.c_contiguous
+        testing.assert_array_equal(matrix, np.arange(size**2).reshape(size, size).T)
+
+
+def test_load_frame() -> None:
+    """Test that `load_frame()` parses a file only once for consecutive calls."""
+    with tempfile.TemporaryDirectory() as directory_str:
+        path = pathlib.Path(directory_str) / "image_1.json"
+        path.write_text(json.dumps(_create_frame(1)))
+
+        arkit._load_frame.cache_clear()
+        first_frame = arkit.load_frame(path)
+        second_frame = arkit.load_frame(path)
+
+    assert first_frame is second_frame
+    assert first_frame.resolution == (4, 2)
+    testing.assert_array_equal(first_frame.depth_map.values, np.array([1.0, 1.0]))
+
+
+def test_load_frame_modified() -> None:
+    """Test that `load_frame()` parses a file again once it is modified."""
+    with tempfile.TemporaryDirectory() as directory_str:
+        path = pathlib.Path(directory_str) / "image_1.json"
+        path.write_text(json.dumps(_create_frame(1)))
+        first_frame = arkit.load_frame(path)
+
+        path.write_text(json.dumps(_create_frame(2)))
+        modified_time_ns = path.stat().st_mtime_ns + 1
+        os.utime(path, ns=(modified_time_ns, modified_time_ns))
+        second_frame = arkit.load_frame(path)
+
+    testing.assert_array_equal(first_frame.depth_map.values, np.array([1.0, 1.0]))
+    testing.assert_array_equal(second_frame.depth_map.values, np.array([2.0, 2.0]))
+
+
+class TestArkitImageLoader:
+    """Test suite for the `ArkitImageLoader` class."""
+
+    @pytest.fixture
+    def dataset_path(self) -> typing.Generator[pathlib.Path, None, None]:
+        """Create a dataset with more frames than are loaded ahead."""
+        with tempfile.TemporaryDirectory() as directory_str:
+            dataset_path = pathlib.Path(directory_str)
+            for directory in ("images", "confidence", "depth"):
+                (dataset_path / directory).mkdir()
+
+            for frame_number in range(_NUM_FRAMES):
+                image_id = f"image_{frame_number}"
+                image = np.full((4, 2, 3), frame_number, dtype=np.uint8)
+                cv2.imwrite(
+                    (dataset_path / "images" / f"{image_id}.png").as_posix(), image
+                )
+                cv2.imwrite(
+                    (dataset_path / "confidence" / f"{image_id}.png").as_posix(),
+                    np.full((4, 3), 2, dtype=np.uint8),
+                )
+                (dataset_path / "depth" / f"{image_id}.json").write_text(
+                    json.dumps(_create_frame(frame_number))
+                )
+            yield dataset_path
+
+    def test_iter(self, dataset_path: pathlib.Path) -> None:
+        """Test the `__iter__()` method."""
+        loader = arkit.ArkitImageLoader(dataset_path)
+        assert len(loader) == _NUM_FRAMES
+
+        frames = list(loader)
+        assert [image_id for image_id, *_ in frames] == [
+            f"image_{frame_number}" for frame_number in range(_NUM_FRAMES)
+        ]
+        for frame_number, (_, image, depth_map, confidence_map, camera) in enumerate(
+            frames
+        ):
+            testing.assert_array_equal(image, np.full((4, 2, 3), frame_number))
+            testing.assert_array_equal(depth_map, np.full((4, 2), frame_number))
+            testing.assert_array_equal(confidence_map, np.full((4, 2), 2))
+            assert confidence_map is not None
+            assert confidence_map.flags.c_contiguous
+            testing.assert_array_equal(camera.view_matrix, np.eye(4))
+
+    def test_load_depth_map_edges(self, dataset_path: pathlib.Path) -> None:
+        """Test that depths are not blended across an edge when the map is resized."""
+        frame = _create_frame(0)
+        frame["depth_map"]["values"] = [1.0, 5.0]
+        (dataset_path / "depth" / "image_0.json").write_text(json.dumps(frame))
+
+        depth_map = arkit.ArkitImageLoader(dataset_path)._load_depth_map("image_0")
+        testing.assert_array_equal(
+            depth_map, np.array([[1, 1], [1, 1], [5, 5], [5, 5]])
+        )
+
+    def test_len_without_images(self) -> None:
+        """Test the `__len__()` method for a dataset without images."""
+        with tempfile.TemporaryDirectory() as directory_str:
+            assert len(arkit.ArkitImageLoader(pathlib.Path(directory_str))) == 0
+
+    def test_load_image_not_found(self, dataset_path: pathlib.Path) -> None:
+        """Test that a missing image raises an error."""
+        with pytest.raises(FileNotFoundError):
+            arkit.ArkitImageLoader(dataset_path)._load_image("image_100")
+
+    def test_get_confidence_map_invalid(self, dataset_path: pathlib.Path) -> None:
+        """Test that an unreadable confidence map is treated as not available."""
+        loader = arkit.ArkitImageLoader(dataset_path)
+        (dataset_path / "confidence" / "image_0.png").write_bytes(b"")
+        (dataset_path / "confidence" / "image_1.png").write_bytes(b"invalid")
+        (dataset_path / "confidence" / "image_2.png").unlink()
+
+        assert loader._get_confidence_map("image_0") is None
+        assert loader._get_confidence_map("image_1") is None
+        assert loader._get_confidence_map("image_2") is None
+
+    def test_iter_stop_early(self, dataset_path: pathlib.Path) -> None:
+        """Test that the iteration can be stopped before the end."""
+        loader = arkit.ArkitImageLoader(dataset_path)
+        for image_id, *_ in loader:
+            assert image_id == "image_0"
+            break
@@ -0,0 +1,36 @@
+"""Unit tests for the `arkit_ue5` module."""
+
+import pathlib
+import tempfile
+
+import numpy as np
+import pytest
+from numpy import testing
+
+from mcd.loader import arkit_ue5
+
+
+class TestArkitUe5RefinementDataLoader:
+    """Test suite for the `ArkitUe5RefinementDataLoader` class."""
+
+    def test_get_depth_map_from_csv(self) -> None:
+        """Test the `get_depth_map()` method for a CSV file."""
+        with tempfile.TemporaryDirectory() as directory_str:
+            depth_path = pathlib.Path(directory_str) / "image_0.csv"
+            depth_path.write_text("0.5,1.0,1.5\n2.0,2.5,3.0\n")
+
+            depth_map = arkit_ue5.ArkitUe5RefinementDataLoader().get_depth_map(
+                depth_path
+            )
+
+        assert depth_map.dtype == np.float32
+        testing.assert_array_equal(
+            depth_map, np.array([[0.5, 1.0, 1.5], [2.0, 2.5, 3.0]])
+        )
+
+    def test_get_depth_map_unsupported_format(self) -> None:
+        """Test the `get_depth_map()` method for an unsupported format."""
+        with pytest.raises(ValueError, match="Unsupported depth map format"):
+            arkit_ue5.ArkitUe5RefinementDataLoader().get_depth_map(
+                pathlib.Path("image_0.txt")
+            )
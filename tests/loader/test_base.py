@@ -2,6 +2,7 @@
 
 import pathlib
 import tempfile
+from unittest import mock
 
 import pytest
 
@@ -54,3 +55,23 @@ class TestDataLoaderBase:
                     base._DataLoaderBase().get_after_dataset_path(
                         datasets_directory, "before"
                     )
+
+        def test_get_after_dataset_path_cache(self) -> None:
+            """Test that the result is cached until the datasets are changed."""
+            with tempfile.TemporaryDirectory() as datasets_directory_str:
+                datasets_directory = pathlib.Path(datasets_directory_str)
+                (datasets_directory / "before").mkdir()
+                (datasets_directory / "after").mkdir()
+
+                loader = base._DataLoaderBase()
+                loader.get_after_dataset_path(datasets_directory, "before")
+                with mock.patch.object(base.os, "scandir") as scandir:
+                    after_dataset_path = loader.get_after_dataset_path(
+                        datasets_directory, "before"
+                    )
+                scandir.assert_not_called()
+                assert after_dataset_path == datasets_directory / "after"
+
+                (datasets_directory / "other").mkdir()
+                with pytest.raises(exceptions.TooManyDatasetsError):
+                    loader.get_after_dataset_path(datasets_directory, "before")
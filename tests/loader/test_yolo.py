@@ -1,6 +1,7 @@
 """Unit tests for the `yolo` module."""
 
 import pathlib
+import tempfile
 import typing
 
 from mcd.change_detection import label
@@ -34,6 +35,21 @@ class TestYoloObjectDetectionDataLoader:
             _TEST_DATA_DIRECTORY / "dataset1" / "image_123" / "labels" / "image_123.txt"
         ]
 
+    def test_get_labels_path_without_labels(self) -> None:
+        """Test the `_get_labels_path()` method with images without labels."""
+        with tempfile.TemporaryDirectory() as directory_str:
+            dataset_path = pathlib.Path(directory_str)
+            (dataset_path / "image_0").mkdir()
+            (dataset_path / "image_1" / "labels").mkdir(parents=True)
+            (dataset_path / "image_1" / "labels" / "image_1.txt").touch()
+            (dataset_path / "image_2.txt").touch()
+
+            labels_path = list(
+                yolo.YoloObjectDetectionDataLoader().get_labels_path(dataset_path)
+            )
+
+        assert labels_path == [dataset_path / "image_1" / "labels" / "image_1.txt"]
+
     def test_read_labels(self) -> None:
         """Test the `_read_labels()` method."""
         change_detector = yolo.YoloObjectDetectionDataLoader()
@@ -55,3 +71,16 @@ class TestYoloObjectDetectionDataLoader:
             ),
         ]
         assert labels == expected_labels
+
+    def test_read_labels_label_name(self) -> None:
+        """Test the `_read_labels()` method with a label name instead of an ID."""
+        with tempfile.TemporaryDirectory() as directory_str:
+            label_path = pathlib.Path(directory_str) / "image_0.txt"
+            label_path.write_text("chair 0.5 0.5 0.2 0.2\n12 0.25 0.25 0.1 0.1\n")
+
+            labels = yolo.YoloObjectDetectionDataLoader().read_labels(label_path)
+
+        assert [(info.label_id, info.label_name) for info in labels] == [
+            (None, "chair"),
+            (12, None),
+        ]
@@ -0,0 +1 @@
+"""Unit tests for the `object_detection` package."""
@@ -0,0 +1,179 @@
+"""Unit tests for the `yolo` module."""
+
+import pathlib
+import tempfile
+import typing
+from unittest import mock
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+import pytest
+from numpy import testing
+
+from mcd.object_detection import yolo
+
+_NUM_IMAGES: typing.Final[int] = 5
+"""Number of images in the test dataset, which is not a multiple of the batch size."""
+
+_BATCH_SIZE: typing.Final[int] = 2
+"""Batch size used in the tests."""
+
+
+class _Boxes:
+    """Stub of the boxes of a YOLO result, already on the CPU as NumPy arrays."""
+
+    def __init__(
+        self, cls: npt.NDArray[np.float32], xywhn: npt.NDArray[np.float32]
+    ) -> None:
+        self.cls = cls
+        self.xywhn = xywhn
+
+    def cpu(self) -> typing.Self:
+        """Return the boxes on the CPU."""
+        return self
+
+    def numpy(self) -> typing.Self:
+        """Return the boxes as NumPy arrays."""
+        return self
+
+
+def _create_result(boxes: _Boxes | None) -> mock.Mock:
+    """Create a stub of a YOLO result with the given boxes."""
+    return mock.Mock(boxes=boxes)
+
+
+def _save_txt(boxes: _Boxes) -> str:
+    """Format the boxes in the same way as `Results.save_txt()` of YOLO."""
+    lines = []
+    for cls, xywhn in zip(boxes.cls, boxes.xywhn, strict=True):
+        line = (int(cls), *xywhn)
+        lines.append(("%g " * len(line)).rstrip() % line + "\n")
+    return "".join(lines)
+
+
+@pytest.fixture
+def images_path() -> typing.Generator[pathlib.Path, None, None]:
+    """Create images whose pixel values are 10 times their index."""
+    with tempfile.TemporaryDirectory() as directory_str:
+        images_path = pathlib.Path(directory_str) / "dataset" / "images"
+        images_path.mkdir(parents=True)
+        for i in range(_NUM_IMAGES):
+            image = np.full((4, 2, 3), 10 * i, dtype=np.uint8)
+            cv2.imwrite((images_path / f"image_{i}.png").as_posix(), image)
+        yield images_path
+
+
+@pytest.fixture
+def detector() -> typing.Generator[yolo.YoloObjectDetector, None, None]:
+    """Create a detector whose model detects a box labeled by the image index."""
+
+    def predict(source: list[npt.NDArray[np.uint8]], **_: object) -> list[mock.Mock]:
+        return [
+            _create_result(
+                _Boxes(
+                    cls=np.array([image[0, 0, 0] // 10], dtype=np.float32),
+                    xywhn=np.array([[0.5, 0.5, 0.25, 0.25]], dtype=np.float32),
+                )
+            )
+            for image in source
+        ]
+
+    with mock.patch.object(yolo.ultralytics, "YOLO") as yolo_class:
+        yolo_class.return_value.predict.side_effect = predict
+        yield yolo.YoloObjectDetector(pathlib.Path("model.pt"))
+
+
+class TestYoloObjectDetector:
+    """Test suite for the `YoloObjectDetector` class."""
+
+    def test_detect_all(
+        self, images_path: pathlib.Path, detector: yolo.YoloObjectDetector
+    ) -> None:
+        """Test that the result of each image is saved under its own path."""
+        results_path = images_path.parents[1] / "results"
+        with mock.patch.object(yolo, "_BATCH_SIZE", _BATCH_SIZE):
+            detector.detect_all(images_path.parent, results_path)
+
+        for i in range(_NUM_IMAGES):
+            label_path = (
+                results_path / "dataset" / f"image_{i}" / "labels" / f"image_{i}.txt"
+            )
+            assert label_path.read_text() == f"{i} 0.5 0.5 0.25 0.25\n"
+
+    def test_save_result(self) -> None:
+        """Test that the labels are written in the format of `Results.save_txt()`."""
+        boxes = _Boxes(
+            cls=np.array([0, 12], dtype=np.float32),
+            xywhn=np.array(
+                [[0.123456789, 0.5, 1.0, 1e-5], [0.1, 0.25, 0.3333333, 0.75]],
+                dtype=np.float32,
+            ),
+        )
+        result = _create_result(boxes)
+        with tempfile.TemporaryDirectory() as directory_str:
+            result_path = pathlib.Path(directory_str) / "image_0"
+            yolo.YoloObjectDetector._save_result(
+                mock.Mock(), result, image_id="image_0", result_path=result_path
+            )
+            labels = (result_path / "labels" / "image_0.txt").read_text()
+
+        assert labels == _save_txt(boxes)
+        result.save.assert_called_once_with(
+            filename=(result_path / "image_0.jpg").as_posix()
+        )
+
+    @pytest.mark.parametrize(
+        "boxes",
+        [
+            None,
+            _Boxes(
+                cls=np.empty(0, dtype=np.float32),
+                xywhn=np.empty((0, 4), dtype=np.float32),
+            ),
+        ],
+    )
+    def test_save_result_no_boxes(self, boxes: _Boxes | None) -> None:
+        """Test that the label file of a previous run is removed without detections."""
+        with tempfile.TemporaryDirectory() as directory_str:
+            result_path = pathlib.Path(directory_str) / "image_0"
+            label_path = result_path / "labels" / "image_0.txt"
+            label_path.parent.mkdir(parents=True)
+            label_path.write_text("0 0.5 0.5 0.25 0.25\n")
+
+            yolo.YoloObjectDetector._save_result(
+                mock.Mock(),
+                _create_result(boxes),
+                image_id="image_0",
+                result_path=result_path,
+            )
+
+            assert not label_path.exists()
+
+
+class TestReadImageBatches:
+    """Test suite for the `_read_image_batches()` function."""
+
+    def test_read_image_batches(self, images_path: pathlib.Path) -> None:
+        """Test that the images are read in full batches followed by the remainder."""
+        image_paths = [images_path / f"image_{i}.png" for i in range(_NUM_IMAGES)]
+        with mock.patch.object(yolo, "_BATCH_SIZE", _BATCH_SIZE):
+            batches = list(yolo._read_image_batches(image_paths))
+
+        assert [batch_paths for batch_paths, _ in batches] == [
+            tuple(image_paths[0:2]),
+            tuple(image_paths[2:4]),
+            tuple(image_paths[4:5]),
+        ]
+        images = [image for _, batch_images in batches for image in batch_images]
+        for i, image in enumerate(images):
+            testing.assert_array_equal(image, np.full((4, 2, 3), 10 * i))
+
+    def test_read_image_batches_empty(self) -> None:
+        """Test that no batches are read for no images."""
+        assert list(yolo._read_image_batches([])) == []
+
+    def test_read_image_batches_not_found(self, images_path: pathlib.Path) -> None:
+        """Test that a missing image raises an error."""
+        with pytest.raises(FileNotFoundError):
+            list(yolo._read_image_batches([images_path / "missing.png"]))
@@ -0,0 +1,201 @@
+"""Unit tests for the `refiner` module."""
+
+import logging
+import multiprocessing
+import pathlib
+import tempfile
+from concurrent import futures
+
+import numpy as np
+import pytest
+
+from mcd import dtypes
+from mcd.change_detection import label
+from mcd.refine import refiner, schema
+
+
+def test_convert_labels_2d_to_3d() -> None:
+    """Test that the centers of the bounding boxes are unprojected at once."""
+    labels_2d = [
+        label.LabelInfo(
+            label_id=0,
+            bounding_box=label.BoundingBox(x=0.25, y=0.5, width=0.5, height=0.5),
+        ),
+        label.LabelInfo(
+            label_name="chair",
+            bounding_box=label.BoundingBox(x=0.6, y=0.1, width=0.2, height=0.2),
+        ),
+    ]
+    camera = dtypes.Camera(
+        intrinsic=np.eye(3, dtype=np.float32), view_matrix=np.eye(4, dtype=np.float32)
+    )
+    depth_map = np.arange(8, dtype=np.float32).reshape(2, 4)
+
+    labels_3d = refiner.Refiner()._convert_labels_2d_to_3d(
+        labels_2d, depth_map, image_size=(4, 2), camera_parameters=camera
+    )
+
+    assert labels_3d == {
+        schema.LabelInfo3d(
+            label_id=0,
+            pixel=dtypes.Pixel(x=1, y=1),
+            point=dtypes.Point(x=5.0, y=5.0, z=5.0),
+        ),
+        schema.LabelInfo3d(
+            label_name="chair",
+            pixel=dtypes.Pixel(x=2, y=0),
+            point=dtypes.Point(x=4.0, y=0.0, z=2.0),
+        ),
+    }
+
+
+def test_convert_labels_2d_to_3d_edge() -> None:
+    """Test that the centers on the edge of the image are clipped into it."""
+    with pytest.warns(UserWarning, match="greater than 1"):
+        labels_2d = [
+            label.LabelInfo(
+                label_id=0,
+                bounding_box=label.BoundingBox(x=1.0, y=1.0, width=0.2, height=0.2),
+            )
+        ]
+    camera = dtypes.Camera(
+        intrinsic=np.eye(3, dtype=np.float32), view_matrix=np.eye(4, dtype=np.float32)
+    )
+    depth_map = np.arange(8, dtype=np.float32).reshape(2, 4)
+
+    labels_3d = refiner.Refiner()._convert_labels_2d_to_3d(
+        labels_2d, depth_map, image_size=(4, 2), camera_parameters=camera
+    )
+
+    assert labels_3d == {
+        schema.LabelInfo3d(
+            label_id=0,
+            pixel=dtypes.Pixel(x=3, y=1),
+            point=dtypes.Point(x=21.0, y=7.0, z=7.0),
+        )
+    }
+
+
+def test_convert_labels_2d_to_3d_empty() -> None:
+    """Test that no labels are converted into an empty set."""
+    camera = dtypes.Camera(
+        intrinsic=np.eye(3, dtype=np.float32), view_matrix=np.eye(4, dtype=np.float32)
+    )
+    labels_3d = refiner.Refiner()._convert_labels_2d_to_3d(
+        [],
+        np.ones((2, 4), dtype=np.float32),
+        image_size=(4, 2),
+        camera_parameters=camera,
+    )
+    assert labels_3d == set()
+
+
+def _create_results_3d() -> schema.ChangeDetection3dResults:
+    """Create 3D results with two clusters of points for each of three objects."""
+    rng = np.random.default_rng(0)
+    results_3d = schema.ChangeDetection3dResults(root={})
+    for image_number in range(12):
+        labels_3d: list[set[schema.LabelInfo3d]] = [set(), set(), set()]
+        for object_number, object_label in enumerate(["chair", "table", "desk"]):
+            for cluster_number in range(2):
+                x, y, z = rng.normal(
+                    loc=(10 * object_number, 10 * cluster_number, 0), scale=0.1
+                ).tolist()
+                labels_3d[(image_number + cluster_number) % 3].add(
+                    schema.LabelInfo3d(
+                        label_name=object_label,
+                        pixel=dtypes.Pixel(x=image_number, y=cluster_number),
+                        point=dtypes.Point(x=x, y=y, z=z),
+                    )
+                )
+        added, removed, unchanged = labels_3d
+        results_3d.root[f"image_{image_number}"] = schema.SinglePairResult3d(
+            added=added, removed=removed, unchanged=unchanged
+        )
+    return results_3d
+
+
+def test_refine() -> None:
+    """Test that refining in worker processes gives the same output as serially."""
+    results_3d = _create_results_3d()
+
+    outputs = []
+    for max_workers in (1, 2):
+        with tempfile.TemporaryDirectory() as directory_str:
+            results_path = pathlib.Path(directory_str)
+            refiner.Refiner().refine(
+                results_3d, results_path, min_samples=5, max_workers=max_workers
+            )
+            outputs.append(
+                (results_path / "refined_change_detection_result_3d.json").read_bytes()
+            )
+
+    serial_output, parallel_output = outputs
+    assert serial_output == parallel_output
+    refined_results_3d = schema.ChangeDetection3dResults.model_validate_json(
+        serial_output
+    )
+    assert refined_results_3d.root.keys() == results_3d.root.keys()
+    assert sum(
+        len(result_3d.added) + len(result_3d.removed) + len(result_3d.unchanged)
+        for _, result_3d in refined_results_3d.items()
+    ) == sum(
+        len(result_3d.added) + len(result_3d.removed) + len(result_3d.unchanged)
+        for _, result_3d in results_3d.items()
+    )
+
+
+def test_set_log_level() -> None:
+    """Test that the log level is set in a worker process."""
+    with futures.ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=multiprocessing.get_context("forkserver"),
+        initializer=refiner._set_log_level,
+        initargs=(logging.DEBUG,),
+    ) as executor:
+        level = executor.submit(refiner._LOGGER.getEffectiveLevel).result()
+    assert level == logging.DEBUG
+
+
+def test_merge_results() -> None:
+    """Test that the results of new images are added and the others are merged."""
+    chair = schema.LabelInfo3d(
+        label_name="chair",
+        pixel=dtypes.Pixel(x=0, y=0),
+        point=dtypes.Point(x=0.0, y=0.0, z=0.0),
+    )
+    table = schema.LabelInfo3d(
+        label_name="table",
+        pixel=dtypes.Pixel(x=1, y=1),
+        point=dtypes.Point(x=1.0, y=1.0, z=1.0),
+    )
+    results_3d = schema.ChangeDetection3dResults(
+        root={
+            "image_0": schema.SinglePairResult3d(
+                added={chair}, removed=set(), unchanged=set()
+            )
+        }
+    )
+    other_results_3d = schema.ChangeDetection3dResults(
+        root={
+            "image_0": schema.SinglePairResult3d(
+                added=set(), removed={table}, unchanged=set()
+            ),
+            "image_1": schema.SinglePairResult3d(
+                added=set(), removed=set(), unchanged={table}
+            ),
+        }
+    )
+
+    refiner.Refiner()._merge_results(results_3d, other_results_3d)
+
+    assert results_3d == schema.ChangeDetection3dResults(
+        root={
+            "image_0": schema.SinglePairResult3d(
+                added={chair}, removed={table}, unchanged=set()
+            ),
+            "image_1": schema.SinglePairResult3d(
+                added=set(), removed=set(), unchanged={table}
+            ),
+        }
+    )
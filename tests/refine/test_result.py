@@ -249,3 +249,5 @@ class TestClusteredPoints:
         testing.assert_array_equal(
             points_in_cluster.changes, np.array([[cd_result.Change.REMOVED.value]])
         )
+
+        assert clustered_points.get_points_in_cluster(2).size == 0
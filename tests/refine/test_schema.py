@@ -1,7 +1,9 @@
 """Unit tests for the `schema` module."""
 
+import numpy as np
 import pydantic
 import pytest
+from numpy import testing
 
 from mcd import dtypes
 from mcd.change_detection import label, result
@@ -30,6 +32,26 @@ class TestChangePoints:
         change_points = schema.ChangePoints(root=change_point_list)
         assert change_points._serialize_model() == change_point_list
 
+    def test_coordinates(self) -> None:
+        """Test that the coordinates are stacked into a float64 array."""
+        change_points = schema.ChangePoints(
+            root=[
+                schema.ChangePoint(
+                    image_id="image_0",
+                    change=result.Change.ADDED,
+                    point=dtypes.Point(x=0.5, y=1.0, z=1.5),
+                    pixel=dtypes.Pixel(x=0, y=0),
+                )
+            ]
+        )
+        assert change_points.coordinates.dtype == np.float64
+        assert change_points.coordinates.flags.c_contiguous
+        testing.assert_array_equal(change_points.coordinates, [[0.5, 1.0, 1.5]])
+
+    def test_coordinates_empty(self) -> None:
+        """Test that the coordinates of no points keep the shape (0, 3)."""
+        assert schema.ChangePoints(root=[]).coordinates.shape == (0, 3)
+
 
 def _get_example_label_info_3d() -> schema.LabelInfo3d:
     """Get an example `LabelInfo3d` instance."""
@@ -109,6 +131,25 @@ class TestSinglePairResult3d:
             "unchanged": [unchanged_item],
         }
 
+    def test_serialize_model_sorted(self) -> None:
+        """Test that the labels are serialized in a stable order."""
+        labels_3d = [
+            schema.LabelInfo3d(
+                label_name=label_name,
+                pixel=dtypes.Pixel(x=x, y=0),
+                point=dtypes.Point(x=0.0, y=0.0, z=0.0),
+            )
+            for label_name, x in [("table", 0), ("chair", 1), ("chair", 0)]
+        ]
+        single_pair_result = schema.SinglePairResult3d(
+            added=set(labels_3d), removed=set(), unchanged=set()
+        )
+        assert single_pair_result._serialize_model()["added"] == [
+            labels_3d[2],
+            labels_3d[1],
+            labels_3d[0],
+        ]
+
 
 class TestChangeDetection3dResults:
     """Test suite for the `ChangeDetection3dResults` class."""
@@ -137,3 +178,19 @@ class TestChangeDetection3dResults:
         )
 
         assert dict(change_detection_results.items()) == {"image_0": result_3d}
+
+    def test_model_validate(self) -> None:
+        """Test that the dumped results are validated back from dictionaries."""
+        result_3d = schema.SinglePairResult3d(
+            added={_get_example_label_info_3d()}, removed=set(), unchanged=set()
+        )
+        change_detection_results = schema.ChangeDetection3dResults(
+            root={"image_0": result_3d}
+        )
+
+        assert (
+            schema.ChangeDetection3dResults.model_validate(
+                change_detection_results.model_dump(mode="json")
+            )
+            == change_detection_results
+        )
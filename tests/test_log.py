@@ -0,0 +1,18 @@
+"""Unit tests for the `log` module."""
+
+import logging
+
+from mcd import log
+
+
+def test_setup_logger() -> None:
+    """Test that the logger has a single handler and discards debug messages."""
+    logger = logging.getLogger("test_setup_logger")
+    for _ in range(3):
+        logger.addHandler(logging.NullHandler())
+
+    logger = log.setup_logger("test_setup_logger")
+
+    assert len(logger.handlers) == 1
+    assert not logger.isEnabledFor(logging.DEBUG)
+    assert logger.isEnabledFor(logging.INFO)
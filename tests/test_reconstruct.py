@@ -0,0 +1,140 @@
+"""Unit tests for the `reconstruct` module."""
+
+import pathlib
+import tempfile
+from unittest import mock
+
+import numpy as np
+import pytest
+from numpy import testing
+
+from mcd import dtypes, reconstruct
+from mcd.loader import base
+
+
+def test_unproject() -> None:
+    """Test that the pixels are unprojected with the inverse camera transforms."""
+    intrinsic = np.array([[2, 0, 1], [0, 2, 1], [0, 0, 1]], dtype=np.float32)
+    view_matrix = np.eye(4, dtype=np.float32)
+    view_matrix[:3, 3] = [1, 2, 3]
+    camera = dtypes.Camera(intrinsic=intrinsic, view_matrix=view_matrix)
+    depth_map = np.array([[2, 4], [6, 8]], dtype=np.float32)
+
+    points = reconstruct.unproject(
+        camera, x=np.array([0, 1, 1]), y=np.array([0, 0, 1]), depth_map=depth_map
+    )
+
+    assert points.dtype == np.float32
+    testing.assert_allclose(
+        points, np.array([[-2, -3, -1], [-1, -4, 1], [-1, -2, 5]]), atol=1e-6
+    )
+
+
+@pytest.mark.parametrize(("x", "y"), [([2], [0]), ([1], [2]), ([-1], [0])])
+def test_unproject_out_of_bounds(x: list[int], y: list[int]) -> None:
+    """Test that the pixels outside the depth map are rejected."""
+    camera = dtypes.Camera(
+        intrinsic=np.eye(3, dtype=np.float32), view_matrix=np.eye(4, dtype=np.float32)
+    )
+    depth_map = np.array([[1, 2], [3, 4]], dtype=np.float32)
+
+    with pytest.raises(IndexError, match="within the depth map"):
+        reconstruct.unproject(camera, x=np.array(x), y=np.array(y), depth_map=depth_map)
+
+
+def test_reconstruct_confidence_map() -> None:
+    """Test that only confident pixels with a positive depth are reconstructed."""
+    camera = dtypes.Camera(
+        intrinsic=np.eye(3, dtype=np.float32), view_matrix=np.eye(4, dtype=np.float32)
+    )
+    image = np.arange(12, dtype=np.uint8).reshape(2, 2, 3)
+    depth_map = np.array([[0, 1], [2, 3]], dtype=np.float32)
+    confidence_map = np.array([[2, 2], [1, 2]], dtype=np.uint8)
+
+    points, colors = reconstruct.Reconstructor().reconstruct(
+        image, depth_map, camera, confidence_map=confidence_map, max_confidence=2
+    )
+
+    testing.assert_array_equal(points, np.array([[1, 0, 1], [3, 3, 3]]))
+    testing.assert_array_equal(colors, np.array([[3, 4, 5], [9, 10, 11]]))
+
+
+def test_reconstruct_all() -> None:
+    """Test that the points of all the frames are written in frame order."""
+    camera = dtypes.Camera(
+        intrinsic=np.eye(3, dtype=np.float32), view_matrix=np.eye(4, dtype=np.float32)
+    )
+    frames = [
+        (
+            f"image_{frame_number}",
+            np.full((2, 2, 3), frame_number, dtype=np.uint8),
+            np.full((2, 2), frame_number + 1, dtype=np.float32),
+            None,
+            camera,
+        )
+        for frame_number in range(5)
+    ]
+    loader = mock.MagicMock(spec=base.ImageLoaderBase)
+    loader.__len__.return_value = len(frames)
+    loader.__iter__.return_value = iter(frames)
+    loader.correction_matrix = None
+
+    with tempfile.TemporaryDirectory() as directory_str:
+        results_directory = pathlib.Path(directory_str)
+        reconstruct.Reconstructor().reconstruct_all(
+            loader, results_directory, max_workers=2
+        )
+        data = (results_directory / "point_cloud.ply").read_bytes()
+
+    header, body = data.split(b"end_header\n", maxsplit=1)
+    assert b"element vertex 0000000020\n" in header
+    vertices = np.frombuffer(body, dtype=reconstruct._PLY_VERTEX_DTYPE)
+    testing.assert_array_equal(
+        vertices["position"][:, 2], np.repeat(np.arange(1, 6, dtype=np.float32), 4)
+    )
+    testing.assert_array_equal(
+        vertices["color"], np.repeat(np.arange(5, dtype=np.uint8), 12).reshape(-1, 3)
+    )
+
+
+def test_reconstruct_all_failure() -> None:
+    """Test that a failing frame leaves the previous point cloud untouched."""
+    camera = dtypes.Camera(
+        intrinsic=np.eye(3, dtype=np.float32), view_matrix=np.eye(4, dtype=np.float32)
+    )
+    frames = [
+        (
+            f"image_{frame_number}",
+            np.zeros((2, 2, 3), dtype=np.uint8),
+            np.ones((2, 2), dtype=np.float32),
+            None,
+            camera,
+        )
+        for frame_number in range(2)
+    ]
+    loader = mock.MagicMock(spec=base.ImageLoaderBase)
+    loader.__len__.return_value = len(frames)
+    loader.__iter__.return_value = iter(frames)
+    loader.correction_matrix = None
+    reconstructor = reconstruct.Reconstructor()
+    frame_points = (np.zeros((4, 3), dtype=np.float32), np.zeros((4, 3), np.uint8))
+
+    with (
+        tempfile.TemporaryDirectory() as directory_str,
+        mock.patch.object(
+            reconstructor,
+            "reconstruct",
+            side_effect=[frame_points, RuntimeError("broken frame")],
+        ),
+    ):
+        results_directory = pathlib.Path(directory_str)
+        save_path = results_directory / "point_cloud.ply"
+        save_path.write_bytes(b"previous")
+
+        with pytest.raises(RuntimeError, match="broken frame"):
+            reconstructor.reconstruct_all(loader, results_directory, max_workers=1)
+
+        assert save_path.read_bytes() == b"previous"
+        assert [path.name for path in results_directory.iterdir()] == [
+            "point_cloud.ply"
+        ]